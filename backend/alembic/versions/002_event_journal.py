@@ -0,0 +1,34 @@
+"""Event journal - sequence numbers on realtime events
+
+Revision ID: 002_event_journal
+Revises: 001_baseline
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002_event_journal'
+down_revision: Union[str, None] = '001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the event sequence column and its indexes."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '002_event_journal.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the event sequence column."""
+    op.execute("DROP INDEX IF EXISTS idx_realtime_events_project_seq")
+    op.execute("DROP INDEX IF EXISTS uq_realtime_events_seq")
+    op.execute("ALTER TABLE realtime_events DROP COLUMN IF EXISTS seq")
@@ -0,0 +1,6 @@
+-- 002_event_journal.sql
+-- Global event sequence used for journal flushing and replay cursors.
+ALTER TABLE realtime_events ADD COLUMN IF NOT EXISTS seq bigint NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_realtime_events_seq ON realtime_events(seq);
+CREATE INDEX IF NOT EXISTS idx_realtime_events_project_seq ON realtime_events(project_id, seq);
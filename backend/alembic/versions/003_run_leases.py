@@ -0,0 +1,35 @@
+"""Run leases - runner claims on agent runs
+
+Revision ID: 003_run_leases
+Revises: 002_event_journal
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003_run_leases'
+down_revision: Union[str, None] = '002_event_journal'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the claim and lease columns to agent_runs."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '003_run_leases.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the claim and lease columns."""
+    op.execute("DROP INDEX IF EXISTS idx_agent_runs_lease_expires")
+    op.execute("DROP INDEX IF EXISTS idx_agent_runs_unclaimed")
+    op.execute("ALTER TABLE agent_runs DROP COLUMN IF EXISTS lease_expires_at")
+    op.execute("ALTER TABLE agent_runs DROP COLUMN IF EXISTS claimed_by")
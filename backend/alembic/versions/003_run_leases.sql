@@ -0,0 +1,14 @@
+-- 003_run_leases.sql
+-- Runner claims: a run is executed by whichever runner holds its lease.
+ALTER TABLE agent_runs ADD COLUMN IF NOT EXISTS claimed_by text NULL;
+ALTER TABLE agent_runs ADD COLUMN IF NOT EXISTS lease_expires_at timestamptz NULL;
+
+-- Claimable runs per project, oldest first
+CREATE INDEX IF NOT EXISTS idx_agent_runs_unclaimed
+  ON agent_runs(project_id, started_at)
+  WHERE status = 'started' AND claimed_by IS NULL;
+
+-- Leases the reaper has to check
+CREATE INDEX IF NOT EXISTS idx_agent_runs_lease_expires
+  ON agent_runs(lease_expires_at)
+  WHERE status = 'started' AND claimed_by IS NOT NULL;
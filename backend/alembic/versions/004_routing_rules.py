@@ -0,0 +1,32 @@
+"""Routing rules - per-project task to agent routing
+
+Revision ID: 004_routing_rules
+Revises: 003_run_leases
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004_routing_rules'
+down_revision: Union[str, None] = '003_run_leases'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the routing_rules table."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '004_routing_rules.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the routing_rules table."""
+    op.execute("DROP TABLE IF EXISTS routing_rules")
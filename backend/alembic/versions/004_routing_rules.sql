@@ -0,0 +1,19 @@
+-- 004_routing_rules.sql
+-- Per-project rules that route queued tasks to agents, evaluated by position.
+CREATE TABLE IF NOT EXISTS routing_rules (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  project_id uuid NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+  agent_name text NOT NULL,
+  position int NOT NULL DEFAULT 100,
+  task_type text NULL,
+  pattern text NULL,
+  pattern_is_regex boolean NOT NULL DEFAULT false,
+  path_glob text NULL,
+  min_priority int NULL,
+  max_priority int NULL,
+  is_enabled boolean NOT NULL DEFAULT true,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_routing_rules_project_position ON routing_rules(project_id, position);
@@ -0,0 +1,32 @@
+"""Scheduling weight - per-project fair-share weight
+
+Revision ID: 005_scheduling_weight
+Revises: 004_routing_rules
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005_scheduling_weight'
+down_revision: Union[str, None] = '004_routing_rules'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the scheduling weight column to projects."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '005_scheduling_weight.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the scheduling weight column."""
+    op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS scheduling_weight")
@@ -0,0 +1,3 @@
+-- 005_scheduling_weight.sql
+-- Relative share of scheduler capacity a project gets while others are busy.
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS scheduling_weight double precision NOT NULL DEFAULT 1.0;
@@ -0,0 +1,34 @@
+"""Task dependencies - DAG edges and pending prerequisite counts
+
+Revision ID: 006_task_dependencies
+Revises: 005_scheduling_weight
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006_task_dependencies'
+down_revision: Union[str, None] = '005_scheduling_weight'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create task_dependencies and the pending_deps counter."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '006_task_dependencies.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop task_dependencies and the pending_deps counter."""
+    op.execute("DROP INDEX IF EXISTS idx_tasks_project_ready")
+    op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS pending_deps")
+    op.execute("DROP TABLE IF EXISTS task_dependencies")
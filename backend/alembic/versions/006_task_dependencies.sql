@@ -0,0 +1,18 @@
+-- 006_task_dependencies.sql
+-- Task DAG: task_id can only be scheduled once depends_on_task_id is done.
+CREATE TABLE IF NOT EXISTS task_dependencies (
+  task_id uuid NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  depends_on_task_id uuid NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (task_id, depends_on_task_id),
+  CONSTRAINT ck_task_dependencies_not_self CHECK (task_id <> depends_on_task_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_dependencies_depends_on ON task_dependencies(depends_on_task_id);
+
+-- Number of prerequisites not yet satisfied; only tasks at zero are scheduled
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS pending_deps int NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_tasks_project_ready
+  ON tasks(project_id, priority, created_at)
+  WHERE status = 'queued' AND pending_deps = 0;
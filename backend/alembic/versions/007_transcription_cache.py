@@ -0,0 +1,34 @@
+"""Transcription cache - content hashes and cached transcripts
+
+Revision ID: 007_transcription_cache
+Revises: 006_task_dependencies
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007_transcription_cache'
+down_revision: Union[str, None] = '006_task_dependencies'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add recordings.content_hash and the transcription_cache table."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '007_transcription_cache.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the transcription cache and recordings.content_hash."""
+    op.execute("DROP TABLE IF EXISTS transcription_cache")
+    op.execute("DROP INDEX IF EXISTS idx_recordings_content_hash")
+    op.execute("ALTER TABLE recordings DROP COLUMN IF EXISTS content_hash")
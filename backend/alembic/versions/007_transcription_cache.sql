@@ -0,0 +1,16 @@
+-- 007_transcription_cache.sql
+-- Recordings remember the sha256 of their audio so identical uploads can reuse a transcript.
+ALTER TABLE recordings ADD COLUMN IF NOT EXISTS content_hash text NULL;
+
+CREATE INDEX IF NOT EXISTS idx_recordings_content_hash ON recordings(content_hash);
+
+-- Transcripts keyed by audio and by the model settings that produced them
+CREATE TABLE IF NOT EXISTS transcription_cache (
+  content_hash text NOT NULL,
+  model_size text NOT NULL,
+  compute_type text NOT NULL,
+  transcript_text text NOT NULL,
+  transcript_json jsonb NOT NULL,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (content_hash, model_size, compute_type)
+);
@@ -0,0 +1,33 @@
+"""Recording media - normalized and playback copies
+
+Revision ID: 008_recording_media
+Revises: 007_transcription_cache
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008_recording_media'
+down_revision: Union[str, None] = '007_transcription_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the normalized and playback paths of recordings."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '008_recording_media.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the normalized and playback paths of recordings."""
+    op.execute("ALTER TABLE recordings DROP COLUMN IF EXISTS playback_path")
+    op.execute("ALTER TABLE recordings DROP COLUMN IF EXISTS normalized_path")
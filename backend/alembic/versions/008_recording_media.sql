@@ -0,0 +1,4 @@
+-- 008_recording_media.sql
+-- Uploads are transcoded to a 16 kHz mono WAV for Whisper and an Opus copy for playback.
+ALTER TABLE recordings ADD COLUMN IF NOT EXISTS normalized_path text NULL;
+ALTER TABLE recordings ADD COLUMN IF NOT EXISTS playback_path text NULL;
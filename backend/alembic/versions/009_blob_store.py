@@ -0,0 +1,35 @@
+"""Blob store - content-addressed blobs with reference counts
+
+Revision ID: 009_blob_store
+Revises: 008_recording_media
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009_blob_store'
+down_revision: Union[str, None] = '008_recording_media'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the blobs table and the triggers that count references to it."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '009_blob_store.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the reference triggers and the blobs table."""
+    op.execute("DROP TRIGGER IF EXISTS trg_artifacts_blob_refs ON artifacts")
+    op.execute("DROP TRIGGER IF EXISTS trg_recordings_blob_refs ON recordings")
+    op.execute("DROP FUNCTION IF EXISTS blobs_track_refs()")
+    op.execute("DROP TABLE IF EXISTS blobs")
@@ -0,0 +1,41 @@
+-- 009_blob_store.sql
+-- Content-addressed blobs. Storage path columns hold a blob's sha256 (or a
+-- legacy absolute path); refcount counts the columns pointing at a blob.
+CREATE TABLE IF NOT EXISTS blobs (
+  sha256 text PRIMARY KEY,
+  size bigint NOT NULL,
+  refcount int NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(updated_at) WHERE refcount <= 0;
+
+-- Keep refcounts in step with the columns named in the trigger arguments.
+-- Doing this in the database also covers rows removed by ON DELETE CASCADE.
+CREATE OR REPLACE FUNCTION blobs_track_refs() RETURNS trigger AS $$
+DECLARE
+  col text;
+  old_ref text;
+  new_ref text;
+BEGIN
+  FOREACH col IN ARRAY TG_ARGV LOOP
+    old_ref := CASE WHEN TG_OP <> 'INSERT' THEN to_jsonb(OLD) ->> col END;
+    new_ref := CASE WHEN TG_OP <> 'DELETE' THEN to_jsonb(NEW) ->> col END;
+    IF old_ref IS DISTINCT FROM new_ref THEN
+      UPDATE blobs SET refcount = refcount - 1, updated_at = now() WHERE sha256 = old_ref;
+      UPDATE blobs SET refcount = refcount + 1, updated_at = now() WHERE sha256 = new_ref;
+    END IF;
+  END LOOP;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_recordings_blob_refs ON recordings;
+CREATE TRIGGER trg_recordings_blob_refs
+  AFTER INSERT OR UPDATE OR DELETE ON recordings
+  FOR EACH ROW EXECUTE FUNCTION blobs_track_refs('storage_path', 'normalized_path', 'playback_path');
+
+DROP TRIGGER IF EXISTS trg_artifacts_blob_refs ON artifacts;
+CREATE TRIGGER trg_artifacts_blob_refs
+  AFTER INSERT OR UPDATE OR DELETE ON artifacts
+  FOR EACH ROW EXECUTE FUNCTION blobs_track_refs('storage_path');
@@ -0,0 +1,32 @@
+"""Projects created_at index - keyset paging key for project listings
+
+Revision ID: 010_projects_created_index
+Revises: 009_blob_store
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010_projects_created_index'
+down_revision: Union[str, None] = '009_blob_store'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index projects by (created_at, id) for cursor pagination."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '010_projects_created_index.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the projects created_at index."""
+    op.execute("DROP INDEX IF EXISTS idx_projects_created_id")
@@ -0,0 +1,3 @@
+-- 010_projects_created_index.sql
+-- Project listings page on the immutable (created_at, id) key
+CREATE INDEX IF NOT EXISTS idx_projects_created_id ON projects(created_at, id);
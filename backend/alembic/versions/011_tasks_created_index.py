@@ -0,0 +1,32 @@
+"""Tasks created_at index - keyset paging key for task listings
+
+Revision ID: 011_tasks_created_index
+Revises: 010_projects_created_index
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+import os
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011_tasks_created_index'
+down_revision: Union[str, None] = '010_projects_created_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index tasks by (project_id, created_at, id) for cursor pagination."""
+    migration_dir = os.path.dirname(os.path.abspath(__file__))
+    sql_file = os.path.join(migration_dir, '011_tasks_created_index.sql')
+
+    with open(sql_file, 'r') as f:
+        op.execute(f.read())
+
+
+def downgrade() -> None:
+    """Drop the tasks created_at index."""
+    op.execute("DROP INDEX IF EXISTS idx_tasks_project_created_id")
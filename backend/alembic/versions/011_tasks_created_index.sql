@@ -0,0 +1,3 @@
+-- 011_tasks_created_index.sql
+-- Task listings page on the immutable (created_at, id) key within a project
+CREATE INDEX IF NOT EXISTS idx_tasks_project_created_id ON tasks(project_id, created_at, id);
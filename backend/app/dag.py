@@ -0,0 +1,147 @@
+from typing import Any
+from uuid import UUID
+from sqlalchemy import select, text, update
+from redis.asyncio import Redis as AsyncRedis
+from sqlalchemy.ext.asyncio import AsyncSession
+from .events import emit_event_async
+from .models import Task, TaskDependency
+
+
+# A prerequisite is satisfied once its work succeeded: the run finished
+# cleanly (needs_review) or the task was accepted (done)
+SATISFIED_STATUSES = {"needs_review", "done"}
+
+# Does :prereq (transitively) depend on :task? If so, task -> prereq closes a cycle.
+_REACHES = text("""
+WITH RECURSIVE reach(id) AS (
+    SELECT depends_on_task_id FROM task_dependencies WHERE task_id = :prereq
+    UNION
+    SELECT d.depends_on_task_id
+    FROM task_dependencies d JOIN reach r ON d.task_id = r.id
+)
+SELECT 1 FROM reach WHERE id = :task LIMIT 1
+""")
+
+
+class DependencyError(ValueError):
+    """A dependency edge that would break the task DAG."""
+
+
+async def _lock_project_graph(db: AsyncSession, project_id: UUID) -> None:
+    # Serialize edge inserts per project so two concurrent inserts can't
+    # together close a cycle that neither sees alone
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"),
+        {"key": f"task-dag:{project_id}"}
+    )
+
+
+async def add_dependency(db: AsyncSession, task: Task, depends_on_task_id: UUID) -> None:
+    """
+    Make `task` wait for another task in the same project.
+
+    Rejects self-edges, cross-project edges and edges that would create a
+    cycle. Bumps task.pending_deps unless the prerequisite is already
+    satisfied. The caller commits.
+    """
+    if depends_on_task_id == task.id:
+        raise DependencyError("A task cannot depend on itself")
+
+    await _lock_project_graph(db, task.project_id)
+
+    # Lock the prerequisite so a concurrent status change can't slip between
+    # reading its status and counting it
+    prereq = await db.get(Task, depends_on_task_id, with_for_update=True, populate_existing=True)
+    if not prereq or prereq.project_id != task.project_id:
+        raise DependencyError("Prerequisite task not found in this project")
+
+    existing = await db.get(TaskDependency, (task.id, depends_on_task_id))
+    if existing:
+        return
+
+    if await db.scalar(_REACHES, {"prereq": depends_on_task_id, "task": task.id}):
+        raise DependencyError("Dependency would create a cycle")
+
+    db.add(TaskDependency(task_id=task.id, depends_on_task_id=depends_on_task_id))
+    if prereq.status not in SATISFIED_STATUSES:
+        await db.execute(
+            update(Task).where(Task.id == task.id).values(pending_deps=Task.pending_deps + 1),
+            execution_options={"synchronize_session": False}
+        )
+    await db.flush()
+    await db.refresh(task)
+
+
+async def remove_dependency(db: AsyncSession, task: Task, depends_on_task_id: UUID) -> bool:
+    """Drop an edge, releasing its pending count if it was still unsatisfied. The caller commits."""
+    edge = await db.get(TaskDependency, (task.id, depends_on_task_id))
+    if not edge:
+        return False
+
+    prereq = await db.get(Task, depends_on_task_id, with_for_update=True, populate_existing=True)
+    await db.delete(edge)
+    if prereq and prereq.status not in SATISFIED_STATUSES:
+        await db.execute(
+            update(Task).where(Task.id == task.id).values(pending_deps=Task.pending_deps - 1),
+            execution_options={"synchronize_session": False}
+        )
+    await db.flush()
+    await db.refresh(task)
+    return True
+
+
+async def list_prerequisites(db: AsyncSession, task_id: UUID) -> list[Task]:
+    return list((await db.scalars(
+        select(Task)
+        .join(TaskDependency, TaskDependency.depends_on_task_id == Task.id)
+        .where(TaskDependency.task_id == task_id)
+        .order_by(Task.created_at.asc())
+    )).all())
+
+
+async def on_status_change(db: AsyncSession, task: Task, old_status: str) -> list[dict[str, Any]]:
+    """
+    Update dependents' pending counts after `task` changed status.
+
+    Only crossings of the satisfied boundary touch the counts, so each
+    dependent is adjusted by exactly the edges into it and nothing is
+    rescanned. Returns the dependents that became ready (queued with no
+    pending prerequisites) for the caller to announce. The caller must have
+    read `old_status` under the task's row lock (SELECT ... FOR UPDATE), or
+    two concurrent changes can both cross the boundary; the caller commits.
+    """
+    was = old_status in SATISFIED_STATUSES
+    now = task.status in SATISFIED_STATUSES
+    if was == now:
+        return []
+
+    # Write the new status first; add_dependency locks the same row before
+    # counting it
+    await db.flush()
+
+    delta = -1 if now else 1
+    dependents = select(TaskDependency.task_id).where(TaskDependency.depends_on_task_id == task.id)
+    rows = (await db.execute(
+        update(Task)
+        .where(Task.id.in_(dependents))
+        .values(pending_deps=Task.pending_deps + delta)
+        .returning(Task.id, Task.status, Task.pending_deps),
+        execution_options={"synchronize_session": False}
+    )).all()
+
+    return [
+        {"task_id": str(task_id), "status": status, "pending_deps": pending}
+        for task_id, status, pending in rows
+        if now and status == "queued" and pending == 0
+    ]
+
+
+async def announce_unlocked(
+    db: AsyncSession,
+    redis: AsyncRedis,
+    project_id: UUID,
+    unlocked: list[dict[str, Any]]
+) -> None:
+    """Publish task.updated for tasks that just became ready, waking the scheduler."""
+    for payload in unlocked:
+        await emit_event_async(db, redis, project_id, "task.updated", {**payload, "unlocked": True})
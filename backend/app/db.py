@@ -1,11 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from .settings import settings
 
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+_pool_options = dict(
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+)
+
+engine = create_engine(settings.DATABASE_URL, **_pool_options)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# psycopg3 serves both engines; the async one runs on its asyncio driver
+async_engine = create_async_engine(settings.DATABASE_URL, **_pool_options)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     pass
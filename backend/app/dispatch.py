@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from .db import AsyncSessionLocal
+from .events import emit_event_async
+from .models import Agent, AgentRun, Project, Task
+from .rqueue import get_async_redis
+from .schemas import AgentOut, AgentRunOut, ProjectOut, TaskOut
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_key(project_id: UUID | str) -> str:
+    return f"runner:dispatch:{project_id}"
+
+
+def push_runs(redis: Redis, project_id: UUID, run_ids: list[UUID] | list[str]) -> None:
+    """
+    Wake runners waiting on the project's dispatch list, one hint per run.
+
+    All hints go out in a single RPUSH. The list only carries hints; runners
+    still have to claim the run, so a stale or duplicate hint never leads to
+    a second execution.
+    """
+    if run_ids:
+        redis.rpush(dispatch_key(project_id), *[str(run_id) for run_id in run_ids])
+
+
+async def claim_next_run(db: AsyncSession, project_ids: list[UUID], runner_id: str) -> AgentRun | None:
+    """
+    Claim the oldest unclaimed started run across the given projects.
+
+    Concurrent claimers skip rows locked by each other, so every run is
+    handed to exactly one runner.
+    """
+    if not project_ids:
+        return None
+
+    run = await db.scalar(
+        select(AgentRun)
+        .where(
+            AgentRun.project_id.in_(project_ids),
+            AgentRun.status == "started",
+            AgentRun.claimed_by.is_(None),
+        )
+        .order_by(AgentRun.started_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if not run:
+        await db.rollback()
+        return None
+
+    run.claimed_by = runner_id
+    run.lease_expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.RUN_LEASE_SECONDS)
+    await db.commit()
+    return run
+
+
+async def resolve_runner_projects(
+    db: AsyncSession,
+    project_ids: list[UUID] | None,
+    repo_roots: list[str] | None
+) -> list[UUID]:
+    """
+    Work out which projects a runner serves.
+
+    Explicit project_ids win; otherwise every project whose default_repo_path
+    lies inside one of repo_roots.
+    """
+    if project_ids:
+        return list(project_ids)
+    if not repo_roots:
+        return []
+
+    roots = [r.rstrip("/") for r in repo_roots if r.strip("/")]
+    conditions = []
+    for root in roots:
+        conditions.append(Project.default_repo_path == root)
+        conditions.append(Project.default_repo_path.startswith(root + "/", autoescape=True))
+    if not conditions:
+        return []
+    return list(await db.scalars(select(Project.id).where(or_(*conditions))))
+
+
+async def build_run_envelope(db: AsyncSession, run: AgentRun) -> dict[str, Any]:
+    """Hydrate a run with everything a runner needs to start it."""
+    task = await db.get(Task, run.task_id) if run.task_id else None
+    project = await db.get(Project, run.project_id)
+    agent = await db.get(Agent, run.agent_id)
+
+    def dump(model, obj) -> dict[str, Any] | None:
+        return model.model_validate(obj, from_attributes=True).model_dump(mode="json") if obj else None
+
+    return {
+        "run": dump(AgentRunOut, run),
+        "task": dump(TaskOut, task),
+        "project": dump(ProjectOut, project),
+        "agent": dump(AgentOut, agent),
+    }
+
+
+async def reap_expired_leases(db: AsyncSession, redis: AsyncRedis) -> int:
+    """Release runs whose runner stopped heartbeating and wake other runners."""
+    rows = (await db.execute(
+        update(AgentRun)
+        .where(
+            AgentRun.status == "started",
+            AgentRun.claimed_by.is_not(None),
+            AgentRun.lease_expires_at < datetime.now(timezone.utc),
+        )
+        .values(claimed_by=None, lease_expires_at=None)
+        .returning(AgentRun.id, AgentRun.project_id)
+    )).all()
+    await db.commit()
+
+    for run_id, project_id in rows:
+        await redis.rpush(dispatch_key(project_id), str(run_id))
+        await emit_event_async(db, redis, project_id, "agent.run.requeued", {
+            "run_id": str(run_id),
+            "reason": "lease_expired"
+        })
+    return len(rows)
+
+
+async def run_lease_reaper() -> None:
+    """Periodically requeue runs with lapsed leases."""
+    while True:
+        await asyncio.sleep(settings.RUN_LEASE_REAP_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                reaped = await reap_expired_leases(db, get_async_redis())
+            if reaped:
+                logger.warning("Requeued %d runs with expired leases", reaped)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Lease reaper failed")
@@ -0,0 +1,180 @@
+import os
+import re
+from typing import BinaryIO
+from fastapi import HTTPException, Request
+from starlette.responses import RedirectResponse, Response
+from starlette.types import Receive, Scope, Send
+from .settings import settings
+from .storage import get_blob_store, is_blob_key
+
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def stat_etag(st: os.stat_result) -> str:
+    """Weak validator for files whose content hash isn't known."""
+    return f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Resolve a single-range Range header to an inclusive (start, end).
+
+    Returns None when the whole file should be sent: no header, or one that
+    is malformed (including last-byte-pos < first-byte-pos) or asks for
+    several ranges, which RFC 9110 lets us ignore. Raises 416 only for a
+    well-formed range that can't be satisfied, i.e. one that starts past
+    the end of the file.
+    """
+    if not header:
+        return None
+    m = _RANGE.fullmatch(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+
+    if not m.group(1):
+        # Suffix range: the last N bytes
+        length = int(m.group(2))
+        if length == 0:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        return max(0, size - length), size - 1
+
+    start = int(m.group(1))
+    if m.group(2) and int(m.group(2)) < start:
+        return None
+    end = int(m.group(2)) if m.group(2) else size - 1
+    if start >= size:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+class FileRangeResponse(Response):
+    """
+    Send a file, or one byte range of it, without reading it into memory.
+
+    Uses the ASGI zero-copy send extension (sendfile) when the server
+    offers it, and otherwise streams DOWNLOAD_CHUNK_BYTES at a time with
+    positional reads from a worker thread.
+    """
+
+    def __init__(self, path: str, start: int, end: int, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.start = start
+        self.count = end - start + 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as f:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+            await self._stream(f, send)
+
+    async def _stream(self, f: BinaryIO, send: Send) -> None:
+        from anyio import to_thread
+
+        offset, remaining = self.start, self.count
+        fd = f.fileno()
+        while remaining > 0:
+            chunk = await to_thread.run_sync(os.pread, fd, min(settings.DOWNLOAD_CHUNK_BYTES, remaining), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the body rather than hang
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    etag: str | None = None,
+    filename: str | None = None
+) -> Response:
+    """
+    Serve a stored file with caching validators and Range support.
+
+    `etag` should be derived from the file's content hash when known; files
+    without one get a weak validator from size and mtime. With
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX set, the transfer is handed to the
+    fronting nginx (X-Accel-Redirect), which does ranges and sendfile itself.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = etag or stat_etag(st)
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=0, must-revalidate",
+    }
+    if filename:
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX:
+        rel = os.path.relpath(path, settings.DATA_DIR)
+        headers["X-Accel-Redirect"] = f"{settings.DOWNLOAD_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{rel}"
+        return Response(headers=headers, media_type=media_type)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A Range is only honoured if the client's copy is still current, which
+    # only a strong validator can vouch for
+    if if_range is None or (if_range.strip() == etag and not etag.startswith("W/")):
+        byte_range = parse_range(request.headers.get("range"), st.st_size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(st.st_size)
+        return FileRangeResponse(path, 0, st.st_size - 1, headers=headers, media_type=media_type)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return FileRangeResponse(path, start, end, status_code=206, headers=headers, media_type=media_type)
+
+
+def blob_response(request: Request, ref: str, media_type: str, filename: str | None = None) -> Response:
+    """
+    Serve a storage ref (blob key or legacy path).
+
+    Blob keys are the sha256 of their bytes and make strong ETags. Blobs
+    that don't live on local disk are served by redirecting to the store's
+    presigned URL, which handles ranges itself.
+    """
+    store = get_blob_store()
+    etag = f'"{ref}"' if is_blob_key(ref) else None
+    path = store.local_path(ref)
+    if path is None:
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        return RedirectResponse(store.url(ref), status_code=307)
+    return file_response(request, path, media_type, etag, filename)
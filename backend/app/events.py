@@ -1,10 +1,172 @@
 import json
+import logging
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 from uuid import UUID
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import LockNotOwnedError
 from .models import RealtimeEvent
+from .settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Global, monotonically increasing event sequence (used as the replay cursor)
+SEQ_KEY = "events:seq"
+# Per-project lock (suffixed with the project id) held from seq allocation
+# until publish in direct mode, so a project's seqs are committed and
+# published in order. Projects don't wait for each other.
+SEQ_LOCK_KEY = "events:seq:lock"
+
+# Raise the counter to at least ARGV[1], never lowering it. Redis can lose
+# the counter (flush, restart without persistence, older snapshot) while
+# realtime_events keeps every seq it handed out.
+_SEED_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local floor = tonumber(ARGV[1])
+if floor > current then
+  redis.call('SET', KEYS[1], floor)
+  return floor
+end
+return current
+"""
+
+# Allocate a seq, append the event to the journal stream and publish it in one
+# atomic step, so publish order always matches journal order.
+# KEYS: seq counter, journal stream
+# ARGV: channel, envelope JSON (without seq), project_id, event_type, payload JSON, ts
+_JOURNAL_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], seq .. '-0',
+  'seq', seq, 'project_id', ARGV[3], 'event_type', ARGV[4], 'payload', ARGV[5], 'ts', ARGV[6])
+local data = string.sub(ARGV[2], 1, -2) .. ',"seq":' .. seq .. '}'
+redis.call('PUBLISH', ARGV[1], data)
+return seq
+"""
+
+
+def _envelope(project_id: UUID, event_type: str, payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "type": event_type,
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "project_id": str(project_id),
+        "payload": payload,
+    }
+
+
+def _journal_keys() -> list[str]:
+    return [SEQ_KEY, settings.EVENT_JOURNAL_STREAM]
+
+
+def _journal_args(envelope: dict[str, Any]) -> list[str]:
+    return [
+        f"project:{envelope['project_id']}",
+        json.dumps(envelope),
+        envelope["project_id"],
+        envelope["type"],
+        json.dumps(envelope["payload"]),
+        envelope["ts"],
+    ]
+
+
+def _lock_name(project_id: UUID) -> str:
+    return f"{SEQ_LOCK_KEY}:{project_id}"
+
+
+def _lock_lost(project_id: UUID) -> None:
+    # The events are committed by now; a late release must not fail the caller
+    logger.warning(
+        "Event lock for project %s expired before publish; raise EVENT_SEQ_LOCK_SECONDS", project_id
+    )
+
+
+@contextmanager
+def _project_lock(redis: Redis, project_id: UUID) -> Iterator[None]:
+    lock = redis.lock(_lock_name(project_id), timeout=settings.EVENT_SEQ_LOCK_SECONDS, sleep=0.01)
+    lock.acquire()
+    try:
+        yield
+    finally:
+        try:
+            lock.release()
+        except LockNotOwnedError:
+            _lock_lost(project_id)
+
+
+@asynccontextmanager
+async def _project_lock_async(redis: AsyncRedis, project_id: UUID) -> AsyncIterator[None]:
+    lock = redis.lock(_lock_name(project_id), timeout=settings.EVENT_SEQ_LOCK_SECONDS, sleep=0.01)
+    await lock.acquire()
+    try:
+        yield
+    finally:
+        try:
+            await lock.release()
+        except LockNotOwnedError:
+            _lock_lost(project_id)
+
+
+def _max_seq():
+    return select(func.coalesce(func.max(RealtimeEvent.seq), 0))
+
+
+def seed_seq(db: Session, redis: Redis) -> int:
+    """Move the seq counter past every persisted event; returns the counter."""
+    return int(redis.eval(_SEED_SCRIPT, 1, SEQ_KEY, db.scalar(_max_seq())))
+
+
+async def seed_seq_async(db: AsyncSession, redis: AsyncRedis) -> int:
+    return int(await redis.eval(_SEED_SCRIPT, 1, SEQ_KEY, await db.scalar(_max_seq())))
+
+
+def _rows(project_id: UUID, envelopes: list[dict[str, Any]], last_seq: int) -> list[RealtimeEvent]:
+    first = last_seq - len(envelopes) + 1
+    for i, envelope in enumerate(envelopes):
+        envelope["seq"] = first + i
+    return [
+        RealtimeEvent(project_id=project_id, seq=e["seq"], event_type=e["type"], payload=e["payload"])
+        for e in envelopes
+    ]
+
+
+def _insert(db: Session, redis: Redis, project_id: UUID, envelopes: list[dict[str, Any]]) -> None:
+    # The savepoint keeps the caller's pending changes if a seq collides
+    for attempt in range(2):
+        rows = _rows(project_id, envelopes, int(redis.incrby(SEQ_KEY, len(envelopes))))
+        try:
+            with db.begin_nested():
+                db.add_all(rows)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+            logger.warning("Event seq %d was already used; reseeding the counter", rows[0].seq)
+            seed_seq(db, redis)
+
+
+async def _insert_async(
+    db: AsyncSession,
+    redis: AsyncRedis,
+    project_id: UUID,
+    envelopes: list[dict[str, Any]],
+) -> None:
+    for attempt in range(2):
+        rows = _rows(project_id, envelopes, int(await redis.incrby(SEQ_KEY, len(envelopes))))
+        try:
+            async with db.begin_nested():
+                db.add_all(rows)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+            logger.warning("Event seq %d was already used; reseeding the counter", rows[0].seq)
+            await seed_seq_async(db, redis)
 
 
 def emit_event(
@@ -14,16 +176,89 @@ def emit_event(
     event_type: str,
     payload: dict[str, Any],
 ) -> dict[str, Any]:
-    envelope = {
-        "type": event_type,
-        "ts": datetime.now(timezone.utc).isoformat(),
-        "project_id": str(project_id),
-        "payload": payload,
-    }
+    """
+    Persist and publish a realtime event.
+
+    With EVENT_JOURNAL_ENABLED the event is published immediately and
+    appended to the journal stream; app.journal writes it to
+    realtime_events later, so the caller's session is not committed.
+    Otherwise the row is inserted and committed before publishing, under
+    the project's lock so that its seqs reach subscribers in increasing
+    order; emits for different projects run in parallel.
+    """
+    envelope = _envelope(project_id, event_type, payload)
+
+    if settings.EVENT_JOURNAL_ENABLED:
+        script = redis.register_script(_JOURNAL_SCRIPT)
+        envelope["seq"] = int(script(keys=_journal_keys(), args=_journal_args(envelope)))
+        return envelope
+
+    with _project_lock(redis, project_id):
+        _insert(db, redis, project_id, [envelope])
+        db.commit()
+
+        channel = f"project:{project_id}"
+        redis.publish(channel, json.dumps(envelope))
+    return envelope
+
+
+def emit_events(
+    db: Session,
+    redis: Redis,
+    project_id: UUID,
+    events: list[tuple[str, dict[str, Any]]],
+) -> list[dict[str, Any]]:
+    """
+    Persist and publish several events for a project in a few round trips.
+
+    Seqs are allocated in one INCRBY (or one pipelined script call per event
+    in journal mode), rows go in with a single commit and the publishes share
+    one pipeline. Subscribers see the events in list order.
+    """
+    if not events:
+        return []
+    envelopes = [_envelope(project_id, event_type, payload) for event_type, payload in events]
+
+    if settings.EVENT_JOURNAL_ENABLED:
+        script = redis.register_script(_JOURNAL_SCRIPT)
+        pipe = redis.pipeline(transaction=False)
+        for envelope in envelopes:
+            script(keys=_journal_keys(), args=_journal_args(envelope), client=pipe)
+        for envelope, seq in zip(envelopes, pipe.execute()):
+            envelope["seq"] = int(seq)
+        return envelopes
+
+    with _project_lock(redis, project_id):
+        _insert(db, redis, project_id, envelopes)
+        db.commit()
+
+        channel = f"project:{project_id}"
+        pipe = redis.pipeline(transaction=False)
+        for envelope in envelopes:
+            pipe.publish(channel, json.dumps(envelope))
+        pipe.execute()
+    return envelopes
+
+
+async def emit_event_async(
+    db: AsyncSession,
+    redis: AsyncRedis,
+    project_id: UUID,
+    event_type: str,
+    payload: dict[str, Any],
+) -> dict[str, Any]:
+    """Async counterpart of emit_event for handlers using AsyncSession."""
+    envelope = _envelope(project_id, event_type, payload)
+
+    if settings.EVENT_JOURNAL_ENABLED:
+        script = redis.register_script(_JOURNAL_SCRIPT)
+        envelope["seq"] = int(await script(keys=_journal_keys(), args=_journal_args(envelope)))
+        return envelope
 
-    db.add(RealtimeEvent(project_id=project_id, event_type=event_type, payload=payload))
-    db.commit()
+    async with _project_lock_async(redis, project_id):
+        await _insert_async(db, redis, project_id, [envelope])
+        await db.commit()
 
-    channel = f"project:{project_id}"
-    redis.publish(channel, json.dumps(envelope))
+        channel = f"project:{project_id}"
+        await redis.publish(channel, json.dumps(envelope))
     return envelope
@@ -0,0 +1,170 @@
+import json
+import logging
+import socket
+import time
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+from redis import Redis
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from .events import SEQ_KEY, seed_seq
+from .models import RealtimeEvent
+from .settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+GROUP = "journal-flushers"
+
+# Entries left unacknowledged this long by a dead flusher are taken over
+CLAIM_IDLE_MS = 60_000
+
+
+def ensure_group(redis: Redis) -> None:
+    try:
+        redis.xgroup_create(settings.EVENT_JOURNAL_STREAM, GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _decode(fields: dict) -> dict[str, str]:
+    return {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): (v.decode("utf-8") if isinstance(v, bytes) else v)
+        for k, v in fields.items()
+    }
+
+
+def _to_row(fields: dict[str, str]) -> dict[str, Any]:
+    return {
+        "seq": int(fields["seq"]),
+        "project_id": UUID(fields["project_id"]),
+        "event_type": fields["event_type"],
+        "payload": json.loads(fields["payload"]),
+        "created_at": datetime.fromisoformat(fields["ts"]),
+    }
+
+
+def flush_entries(db: Session, redis: Redis, entries: list[tuple[bytes, dict | None]]) -> int:
+    """
+    Bulk-insert journal entries into realtime_events, then ack and delete them.
+
+    Rows carry the seq assigned at publish time, which defines per-project
+    order; redelivered entries are skipped by the unique seq index. An entry
+    whose seq belongs to a different stored event means Redis reissued seqs
+    after losing its counter: the counter is reseeded and the entry stored
+    under a fresh seq rather than dropped.
+    """
+    if not entries:
+        return 0
+
+    # Entries deleted after a crash between XDEL and XACK come back without fields
+    rows = [_to_row(_decode(fields)) for _, fields in entries if fields]
+    if rows:
+        inserted = set(db.scalars(
+            pg_insert(RealtimeEvent)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["seq"])
+            .returning(RealtimeEvent.seq)
+        ))
+        skipped = [r for r in rows if r["seq"] not in inserted]
+        if skipped:
+            _store_reissued(db, redis, skipped)
+        db.commit()
+
+    ids = [entry_id for entry_id, _ in entries]
+    pipe = redis.pipeline()
+    pipe.xack(settings.EVENT_JOURNAL_STREAM, GROUP, *ids)
+    pipe.xdel(settings.EVENT_JOURNAL_STREAM, *ids)
+    pipe.execute()
+    return len(rows)
+
+
+def _store_reissued(db: Session, redis: Redis, rows: list[dict[str, Any]]) -> None:
+    existing = {
+        e.seq: (e.project_id, e.event_type, e.created_at)
+        for e in db.scalars(select(RealtimeEvent).where(RealtimeEvent.seq.in_([r["seq"] for r in rows])))
+    }
+    reissued = [r for r in rows if existing.get(r["seq"]) != (r["project_id"], r["event_type"], r["created_at"])]
+    if not reissued:
+        return
+
+    logger.warning("%d journal events reused seqs already stored; reseeding the counter", len(reissued))
+    seed_seq(db, redis)
+    last_seq = int(redis.incrby(SEQ_KEY, len(reissued)))
+    for i, row in enumerate(reissued):
+        row["seq"] = last_seq - len(reissued) + 1 + i
+    db.execute(pg_insert(RealtimeEvent).values(reissued))
+
+
+def journal_lag(redis: Redis) -> dict[str, Any]:
+    """Number of events not yet persisted and the age of the oldest one."""
+    stream = settings.EVENT_JOURNAL_STREAM
+    pending = redis.xlen(stream)
+    oldest_age_ms = None
+    if pending:
+        oldest = redis.xrange(stream, count=1)
+        if oldest:
+            ts = datetime.fromisoformat(_decode(oldest[0][1])["ts"])
+            oldest_age_ms = int((time.time() - ts.timestamp()) * 1000)
+    return {"pending_events": pending, "oldest_pending_age_ms": oldest_age_ms}
+
+
+def run_flusher(consumer: str | None = None) -> None:
+    """Consume the journal stream forever, persisting events in batches."""
+    from .db import SessionLocal
+    from .rqueue import get_redis
+
+    redis = get_redis()
+    consumer = consumer or socket.gethostname()
+    stream = settings.EVENT_JOURNAL_STREAM
+    batch_size = settings.EVENT_JOURNAL_BATCH_SIZE
+    ensure_group(redis)
+    with SessionLocal() as db:
+        seed_seq(db, redis)
+
+    # Start with entries this consumer read but never acknowledged
+    next_id = "0"
+    last_claim = 0.0
+
+    while True:
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_claim > CLAIM_IDLE_MS / 1000:
+                _, claimed, *_ = redis.xautoclaim(
+                    stream, GROUP, consumer, min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=batch_size
+                )
+                flush_entries(db, redis, claimed)
+                last_claim = time.monotonic()
+
+            resp = redis.xreadgroup(
+                GROUP, consumer, {stream: next_id}, count=batch_size,
+                block=None if next_id == "0" else settings.EVENT_JOURNAL_BLOCK_MS,
+            )
+            entries = [e for _, batch in resp for e in batch] if resp else []
+            if next_id == "0" and not entries:
+                next_id = ">"
+                continue
+
+            flushed = flush_entries(db, redis, entries)
+            if flushed:
+                logger.debug("Flushed %d journal events", flushed)
+        except Exception:
+            logger.exception("Journal flush failed; retrying")
+            db.rollback()
+            next_id = "0"
+            time.sleep(1.0)
+        finally:
+            db.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    run_flusher()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import asyncio
+import logging
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+import numpy as np
+from redis.asyncio import Redis as AsyncRedis
+from sqlalchemy.ext.asyncio import AsyncSession
+from .events import emit_event_async
+from .models import Conversation, Message, Recording
+from .settings import settings
+from .storage import ingest_file_async
+from .transcription import get_model
+
+
+logger = logging.getLogger(__name__)
+
+# Live audio is 16-bit little-endian mono PCM at Whisper's native rate
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+# Live decodes get their own threads so they neither queue behind nor starve
+# the default executor that request handlers use
+_decode_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.STREAM_DECODE_THREADS), thread_name_prefix="live-decode"
+)
+
+
+@dataclass
+class SpeechSegment:
+    index: int
+    start: float
+    end: float
+    audio: np.ndarray
+
+
+class SpeechSegmenter:
+    """
+    Energy-based voice activity detection over a live PCM stream.
+
+    Audio is cut into 30 ms frames; a frame is speech when its RMS level is
+    above STREAM_VAD_ENERGY_THRESHOLD. A segment closes once
+    STREAM_VAD_SILENCE_MS of silence follows speech, or when it reaches
+    STREAM_VAD_MAX_SEGMENT_SECONDS, so a segment is ready to decode as soon
+    as the speaker pauses. A little audio before the first speech frame is
+    kept so word onsets aren't clipped.
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self._frames: list[np.ndarray] = []
+        self._preroll: list[np.ndarray] = []
+        self._silent_frames = 0
+        self._position = 0  # samples consumed
+        self._start = 0  # sample offset of the open segment
+        self._index = 0
+
+        self._threshold = settings.STREAM_VAD_ENERGY_THRESHOLD
+        self._silence_frames = max(1, settings.STREAM_VAD_SILENCE_MS // FRAME_MS)
+        self._preroll_frames = max(0, settings.STREAM_VAD_PREROLL_MS // FRAME_MS)
+        self._max_frames = int(settings.STREAM_VAD_MAX_SEGMENT_SECONDS * 1000 // FRAME_MS)
+
+    @property
+    def duration(self) -> float:
+        return self._position / SAMPLE_RATE
+
+    def feed(self, pcm: bytes) -> list[SpeechSegment]:
+        """Consume raw PCM and return the segments it completed."""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % (FRAME_SAMPLES * SAMPLE_WIDTH)
+        self._pending = data[usable:]
+        if not usable:
+            return []
+
+        samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        done = []
+        for frame in samples.reshape(-1, FRAME_SAMPLES):
+            segment = self._push(frame)
+            if segment:
+                done.append(segment)
+        return done
+
+    def flush(self) -> SpeechSegment | None:
+        """Close the open segment at end of stream."""
+        if self._pending:
+            tail = np.frombuffer(self._pending[:len(self._pending) - len(self._pending) % SAMPLE_WIDTH], dtype="<i2")
+            self._pending = b""
+            if tail.size and self._frames:
+                self._frames.append(tail.astype(np.float32) / 32768.0)
+                self._position += tail.size
+        return self._close()
+
+    def _push(self, frame: np.ndarray) -> SpeechSegment | None:
+        speech = float(np.sqrt(np.mean(frame * frame))) >= self._threshold
+        self._position += FRAME_SAMPLES
+
+        if not self._frames:
+            if not speech:
+                self._preroll.append(frame)
+                if len(self._preroll) > self._preroll_frames:
+                    self._preroll.pop(0)
+                return None
+            self._frames = self._preroll + [frame]
+            self._preroll = []
+            self._start = self._position - FRAME_SAMPLES * len(self._frames)
+            self._silent_frames = 0
+            return None
+
+        self._frames.append(frame)
+        self._silent_frames = 0 if speech else self._silent_frames + 1
+        if self._silent_frames >= self._silence_frames or len(self._frames) >= self._max_frames:
+            return self._close()
+        return None
+
+    def _close(self) -> SpeechSegment | None:
+        if not self._frames:
+            return None
+        audio = np.concatenate(self._frames)
+        segment = SpeechSegment(
+            index=self._index,
+            start=self._start / SAMPLE_RATE,
+            end=(self._start + audio.size) / SAMPLE_RATE,
+            audio=audio,
+        )
+        self._index += 1
+        self._frames = []
+        self._silent_frames = 0
+        return segment
+
+
+def decode_segment(segment: SpeechSegment, language: str | None) -> dict[str, Any]:
+    """Transcribe one speech segment, offsetting timestamps into the recording."""
+    model = get_model()
+    # The segmenter already removed silence; skip the model's own VAD pass
+    parts, info = model.transcribe(segment.audio, language=language, vad_filter=False, beam_size=1)
+    segs = [
+        {
+            "start": round(segment.start + float(s.start), 3),
+            "end": round(segment.start + float(s.end), 3),
+            "text": s.text,
+        }
+        for s in parts
+    ]
+    return {
+        "index": segment.index,
+        "start": segment.start,
+        "end": segment.end,
+        "language": info.language,
+        "text": " ".join(s["text"].strip() for s in segs if s["text"].strip()),
+        "segments": segs,
+    }
+
+
+async def preload_model() -> None:
+    """Load Whisper ahead of the first live stream (STREAM_PRELOAD_MODEL)."""
+    logger.info("Loading Whisper model %s for live transcription", settings.WHISPER_MODEL_SIZE)
+    await asyncio.get_running_loop().run_in_executor(_decode_pool, get_model)
+
+
+def _open_wav(path: str) -> wave.Wave_write:
+    wav = wave.open(path, "wb")
+    wav.setnchannels(1)
+    wav.setsampwidth(SAMPLE_WIDTH)
+    wav.setframerate(SAMPLE_RATE)
+    return wav
+
+
+class LiveTranscription:
+    """
+    Transcribe a recording while it is still being captured.
+
+    PCM written with feed() is appended to the recording's staging WAV and
+    segmented on pauses; each segment is decoded on the live decode threads
+    while more audio keeps arriving, and its text is published immediately
+    as a recording.transcript.partial event. Segments are decoded in order, one
+    at a time per stream. finish() stitches the segments into the final
+    transcript and moves the audio into the blob store.
+
+    Create instances with start().
+    """
+
+    def __init__(
+        self,
+        redis: AsyncRedis,
+        recording: Recording,
+        project_id: UUID,
+        wav: wave.Wave_write,
+        language: str | None = None
+    ):
+        self.redis = redis
+        self.recording = recording
+        self.project_id = project_id
+        self.language = language
+        self.results: list[dict[str, Any]] = []
+        self._segmenter = SpeechSegmenter()
+        self._segments: asyncio.Queue[SpeechSegment | None] = asyncio.Queue()
+        self._wav = wav
+        self._decoder = asyncio.create_task(self._decode_loop())
+
+    @classmethod
+    async def start(
+        cls,
+        redis: AsyncRedis,
+        recording: Recording,
+        project_id: UUID,
+        language: str | None = None
+    ) -> "LiveTranscription":
+        wav = await asyncio.to_thread(_open_wav, recording.storage_path)
+        return cls(redis, recording, project_id, wav, language)
+
+    async def feed(self, pcm: bytes) -> None:
+        await asyncio.to_thread(self._wav.writeframes, pcm)
+        for segment in self._segmenter.feed(pcm):
+            self._segments.put_nowait(segment)
+
+    async def finish(self, db: AsyncSession) -> dict[str, Any]:
+        """Decode what's left, store the stitched transcript and post it to the conversation."""
+        segment = self._segmenter.flush()
+        if segment:
+            self._segments.put_nowait(segment)
+        self._segments.put_nowait(None)
+        await self._decoder
+        await asyncio.to_thread(self._wav.close)
+
+        segs = [s for r in self.results for s in r["segments"]]
+        transcript = " ".join(r["text"] for r in self.results if r["text"]).strip()
+        language = self.language or next((r["language"] for r in self.results if r["text"]), None)
+
+        key = await ingest_file_async(db, self.recording.storage_path)
+        rec = await db.get(Recording, self.recording.id)
+        rec.storage_path = key
+        rec.content_hash = key
+        rec.duration_ms = int(self._segmenter.duration * 1000)
+        rec.transcript_text = transcript
+        rec.transcript_json = {
+            "language": language,
+            "segments": segs,
+            "duration": self._segmenter.duration,
+            "streamed": True,
+        }
+        await db.commit()
+
+        conv = await db.get(Conversation, rec.conversation_id)
+        if conv and transcript:
+            msg = Message(
+                conversation_id=conv.id,
+                role="user",
+                content=transcript,
+                content_format="plain"
+            )
+            db.add(msg)
+            await db.commit()
+            await db.refresh(msg)
+
+            await emit_event_async(db, self.redis, conv.project_id, "conversation.message.created", {
+                "message_id": str(msg.id),
+                "conversation_id": str(conv.id),
+                "from_recording": str(rec.id)
+            })
+
+        return {"recording_id": str(rec.id), "transcript": transcript, "segments": len(segs)}
+
+    async def abort(self) -> None:
+        self._decoder.cancel()
+        await asyncio.gather(self._decoder, return_exceptions=True)
+        await asyncio.to_thread(self._wav.close)
+
+    async def _decode_loop(self) -> None:
+        from .db import AsyncSessionLocal
+
+        while True:
+            segment = await self._segments.get()
+            if segment is None:
+                return
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    _decode_pool, decode_segment, segment, self.language
+                )
+            except Exception:
+                logger.exception("Failed to decode segment %d of recording %s", segment.index, self.recording.id)
+                continue
+            self.results.append(result)
+            if not result["text"]:
+                continue
+            async with AsyncSessionLocal() as db:
+                await emit_event_async(db, self.redis, self.project_id, "recording.transcript.partial", {
+                    "recording_id": str(self.recording.id),
+                    "conversation_id": str(self.recording.conversation_id),
+                    "segment_index": result["index"],
+                    "start": result["start"],
+                    "end": result["end"],
+                    "text": result["text"],
+                })
@@ -1,16 +1,24 @@
+import asyncio
+import hmac
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
-from fastapi.middleware.cors import CORSMiddleware
-from redis import Redis
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
+from fastapi.middleware.cors import CORSMiddleware
 from .settings import settings
-from .deps import get_db
-from .rqueue import get_redis
+from .db import AsyncSessionLocal, async_engine
 from .security import get_user_by_session_token
-from .ws import bridge_redis_to_ws
-from .storage import ensure_dirs
+from .ws import bridge_redis_to_ws, hub
+from .session_cache import run_invalidation_listener
+from .rqueue import get_async_redis, get_redis
+from .journal import journal_lag
+from .scheduler import cached_queue_metrics, scheduler_stats
+from .deps import get_db
+from .events import seed_seq_async
+from .dispatch import run_lease_reaper
+from .storage import ensure_dirs, run_blob_gc
+from .live_transcription import preload_model
 
-from .routers import auth, projects, tasks, agents, runs, conversations, recordings
+from .routers import auth, projects, tasks, agents, routing, runs, runners, conversations, recordings, artifacts
 
 
 @asynccontextmanager
@@ -18,9 +26,23 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     ensure_dirs()
+    # Redis may have lost the event counter since the last run
+    async with AsyncSessionLocal() as db:
+        await seed_seq_async(db, get_async_redis())
+    background = {
+        asyncio.create_task(run_invalidation_listener(hub)),
+        asyncio.create_task(run_lease_reaper()),
+        asyncio.create_task(run_blob_gc()),
+    }
+    if settings.STREAM_PRELOAD_MODEL:
+        background.add(asyncio.create_task(preload_model()))
     yield
     # Shutdown
-    pass
+    for task in background:
+        task.cancel()
+    await asyncio.wait(background)
+    await hub.close()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -35,6 +57,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -42,9 +65,12 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
 app.include_router(tasks.router, prefix="/api", tags=["tasks"])
 app.include_router(agents.router, prefix="/api", tags=["agents"])
+app.include_router(routing.router, prefix="/api", tags=["routing"])
 app.include_router(runs.router, prefix="/api", tags=["runs"])
+app.include_router(runners.router, prefix="/api", tags=["runners"])
 app.include_router(conversations.router, prefix="/api", tags=["conversations"])
 app.include_router(recordings.router, prefix="/api", tags=["recordings"])
+app.include_router(artifacts.router, prefix="/api", tags=["artifacts"])
 
 
 @app.get("/health")
@@ -53,31 +79,58 @@ def health_check() -> dict:
     return {"status": "ok", "app": settings.APP_NAME}
 
 
+def require_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    """Only scrapers holding METRICS_TOKEN may read /metrics."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not authorization or not hmac.compare_digest(authorization.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def metrics(db: Session = Depends(get_db)) -> dict:
+    """
+    Operational metrics for background pipelines and task queues.
+
+    Queue wait statistics are a snapshot up to METRICS_QUEUE_CACHE_SECONDS old.
+    """
+    redis = get_redis()
+    return {
+        "event_journal": journal_lag(redis),
+        "scheduler": scheduler_stats(redis),
+        "queues": cached_queue_metrics(db, redis),
+    }
+
+
 @app.websocket("/ws")
 async def ws_endpoint(
     ws: WebSocket,
     token: str,
     project_id: str,
-    db: Session = Depends(get_db)
+    since: int | None = None
 ) -> None:
     """
     WebSocket endpoint for realtime updates.
 
-    Authenticates user via token and subscribes to project events via Redis pub/sub.
+    Authenticates user via token and subscribes to project events through the
+    process-wide realtime hub. Clients reconnecting with since=<last seen seq>
+    first receive the events they missed, then a replay.completed marker,
+    then live events with no gap or duplicate in between.
     """
     await ws.accept()
 
     # Validate token
-    user = get_user_by_session_token(db, token)
+    # Keep the DB session scoped to the handshake; the socket may stay open for hours
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_session_token(db, token)
     if not user or not user.is_active:
         await ws.close(code=4401)
         return
 
-    # Get Redis connection and bridge events
-    redis: Redis = get_redis()
-
+    # Bridge project events from the shared pub/sub connection
     try:
-        await bridge_redis_to_ws(redis, project_id, ws)
+        await bridge_redis_to_ws(hub, project_id, ws, since)
     except WebSocketDisconnect:
         return
     except Exception:
@@ -0,0 +1,133 @@
+import logging
+import os
+import subprocess
+import wave
+from uuid import UUID
+import numpy as np
+from redis import Redis
+from sqlalchemy.orm import Session
+from .events import emit_event
+from .models import Conversation, Recording
+from .settings import settings
+from .storage import get_blob_store, ingest_file, staging_path
+
+
+logger = logging.getLogger(__name__)
+
+# Whisper's input format; normalized copies can be loaded without a decoder
+SAMPLE_RATE = 16000
+
+
+def probe_duration_ms(path: str) -> int | None:
+    """Container duration in milliseconds, or None if ffprobe can't tell."""
+    out = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+        capture_output=True, text=True, check=True, timeout=settings.MEDIA_FFMPEG_TIMEOUT_SECONDS
+    ).stdout.strip()
+    try:
+        return int(float(out) * 1000)
+    except ValueError:
+        return None
+
+
+def _ffmpeg(src: str, dst: str, *args: str) -> None:
+    # Write next to the target and rename, so readers never see a partial file;
+    # args must name the output format since the temp name has no extension
+    tmp = f"{dst}.tmp"
+    try:
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", src, "-vn", *args, tmp],
+            check=True, capture_output=True, timeout=settings.MEDIA_FFMPEG_TIMEOUT_SECONDS
+        )
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def normalize(src: str, dst: str) -> None:
+    """Transcode to 16 kHz mono 16-bit PCM WAV."""
+    _ffmpeg(src, dst, "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le", "-f", "wav")
+
+
+def encode_playback(src: str, dst: str) -> None:
+    """Transcode to a compact mono Opus file for playback."""
+    _ffmpeg(
+        src, dst,
+        "-ac", "1", "-c:a", "libopus", "-b:a", settings.MEDIA_PLAYBACK_BITRATE, "-application", "voip", "-f", "ogg"
+    )
+
+
+def load_normalized(path: str) -> np.ndarray | None:
+    """
+    Read a 16 kHz mono 16-bit WAV straight into float32 samples.
+
+    Returns None for anything else, which callers hand to a full decoder.
+    """
+    try:
+        with wave.open(path, "rb") as w:
+            if (w.getnchannels(), w.getsampwidth(), w.getframerate()) != (1, 2, SAMPLE_RATE):
+                return None
+            frames = w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def process_recording(db: Session, redis: Redis, recording_id: UUID) -> dict:
+    """
+    Prepare an uploaded recording for transcription and playback.
+
+    Fills in duration_ms and stores a 16 kHz mono WAV for Whisper and a
+    small Opus copy for playback as blobs of their own. The uploaded file
+    stays as storage_path, untouched.
+    """
+    rec = db.query(Recording).filter(Recording.id == recording_id).first()
+    if not rec:
+        return {"ok": False, "error": "recording not found"}
+
+    normalized = staging_path(f"{rec.id}.16k.wav")
+    playback = staging_path(f"{rec.id}.playback.ogg")
+    try:
+        with get_blob_store().open_local(rec.storage_path) as path:
+            duration_ms = probe_duration_ms(path)
+            normalize(path, normalized)
+            encode_playback(path, playback)
+        rec.normalized_path = ingest_file(db, normalized)
+        rec.playback_path = ingest_file(db, playback)
+    except (subprocess.SubprocessError, OSError) as e:
+        logger.warning("Failed to process recording %s: %s", recording_id, e)
+        for path in (normalized, playback):
+            if os.path.exists(path):
+                os.remove(path)
+        return {"ok": False, "error": str(e)}
+
+    rec.duration_ms = duration_ms if duration_ms is not None else rec.duration_ms
+    db.commit()
+
+    conv = db.query(Conversation).filter(Conversation.id == rec.conversation_id).first()
+    if conv:
+        emit_event(db, redis, conv.project_id, "recording.processed", {
+            "recording_id": str(rec.id),
+            "conversation_id": str(conv.id),
+            "duration_ms": rec.duration_ms
+        })
+
+    return {"ok": True, "duration_ms": rec.duration_ms}
+
+
+def process_recording_job(recording_id: str) -> dict:
+    """
+    RQ job wrapper for recording processing.
+    Creates its own DB session and Redis connection.
+    """
+    from .db import SessionLocal
+    from .rqueue import get_redis
+
+    db = SessionLocal()
+    redis = get_redis()
+
+    try:
+        return process_recording(db, redis, UUID(recording_id))
+    finally:
+        db.close()
@@ -1,8 +1,8 @@
 from sqlalchemy import (
-    Column, String, Boolean, Text, Integer, DateTime, ForeignKey, BigInteger, UniqueConstraint, Index
+    Column, String, Boolean, Text, Integer, Float, DateTime, ForeignKey, BigInteger, UniqueConstraint, CheckConstraint, Index
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 from .db import Base
 
@@ -34,11 +34,13 @@ class Project(Base):
     __tablename__ = "projects"
     __table_args__ = (
         Index("idx_projects_updated_at", "updated_at"),
+        Index("idx_projects_created_id", "created_at", "id"),
     )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
     default_repo_path = Column(Text, nullable=True)
+    scheduling_weight = Column(Float, nullable=False, default=1.0)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
@@ -75,11 +77,36 @@ class Agent(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
 
+class RoutingRule(Base):
+    __tablename__ = "routing_rules"
+    __table_args__ = (
+        Index("idx_routing_rules_project_position", "project_id", "position"),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    agent_name = Column(Text, nullable=False)
+    position = Column(Integer, nullable=False, default=100)
+    task_type = Column(Text, nullable=True)
+    pattern = Column(Text, nullable=True)
+    pattern_is_regex = Column(Boolean, nullable=False, default=False)
+    path_glob = Column(Text, nullable=True)
+    min_priority = Column(Integer, nullable=True)
+    max_priority = Column(Integer, nullable=True)
+    is_enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
 class Task(Base):
     __tablename__ = "tasks"
     __table_args__ = (
         Index("idx_tasks_project_status", "project_id", "status"),
         Index("idx_tasks_project_priority_created", "project_id", "priority", "created_at"),
+        Index("idx_tasks_project_created_id", "project_id", "created_at", "id"),
+        Index(
+            "idx_tasks_project_ready", "project_id", "priority", "created_at",
+            postgresql_where=text("status = 'queued' AND pending_deps = 0"),
+        ),
     )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -88,12 +115,24 @@ class Task(Base):
     type = Column(Text, nullable=False, default="code_change")
     priority = Column(Integer, nullable=False, default=3)
     status = Column(Text, nullable=False, default="queued")
+    pending_deps = Column(Integer, nullable=False, default=0)
     requested_by = Column(Text, nullable=False, default="chat")
     created_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
 
+class TaskDependency(Base):
+    __tablename__ = "task_dependencies"
+    __table_args__ = (
+        CheckConstraint("task_id <> depends_on_task_id", name="ck_task_dependencies_not_self"),
+        Index("idx_task_dependencies_depends_on", "depends_on_task_id"),
+    )
+    task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    depends_on_task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
 class TaskEvent(Base):
     __tablename__ = "task_events"
     __table_args__ = (
@@ -111,6 +150,14 @@ class AgentRun(Base):
     __table_args__ = (
         Index("idx_agent_runs_project_started_desc", "project_id", "started_at"),
         Index("idx_agent_runs_task_id", "task_id"),
+        Index(
+            "idx_agent_runs_unclaimed", "project_id", "started_at",
+            postgresql_where=text("status = 'started' AND claimed_by IS NULL"),
+        ),
+        Index(
+            "idx_agent_runs_lease_expires", "lease_expires_at",
+            postgresql_where=text("status = 'started' AND claimed_by IS NOT NULL"),
+        ),
     )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -122,6 +169,8 @@ class AgentRun(Base):
     exit_code = Column(Integer, nullable=True)
     summary = Column(Text, nullable=True)
     metrics = Column(JSONB, nullable=True)
+    claimed_by = Column(Text, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
 
 
 class AgentRunLog(Base):
@@ -169,17 +218,47 @@ class Recording(Base):
     __tablename__ = "recordings"
     __table_args__ = (
         Index("idx_recordings_conversation_created", "conversation_id", "created_at"),
+        Index("idx_recordings_content_hash", "content_hash"),
     )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     conversation_id = Column(UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     storage_path = Column(Text, nullable=False)
     mime_type = Column(Text, nullable=False)
+    # sha256 of the uploaded bytes
+    content_hash = Column(Text, nullable=True)
+    # storage_path and these hold blob keys (or legacy absolute paths):
+    # 16 kHz mono WAV for transcription and Opus copy for playback
+    normalized_path = Column(Text, nullable=True)
+    playback_path = Column(Text, nullable=True)
     duration_ms = Column(Integer, nullable=True)
     transcript_text = Column(Text, nullable=True)
     transcript_json = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
 
+class Blob(Base):
+    # refcount is maintained by triggers on the storage path columns of
+    # recordings and artifacts; blobs left at zero are garbage collected
+    __tablename__ = "blobs"
+    __table_args__ = (
+        Index("idx_blobs_unreferenced", "updated_at", postgresql_where=text("refcount <= 0")),
+    )
+    sha256 = Column(Text, primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    refcount = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class TranscriptionCache(Base):
+    __tablename__ = "transcription_cache"
+    content_hash = Column(Text, primary_key=True)
+    model_size = Column(Text, primary_key=True)
+    compute_type = Column(Text, primary_key=True)
+    transcript_text = Column(Text, nullable=False)
+    transcript_json = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
 class Artifact(Base):
     __tablename__ = "artifacts"
     __table_args__ = (
@@ -200,9 +279,12 @@ class RealtimeEvent(Base):
     __table_args__ = (
         Index("idx_realtime_events_project_created", "project_id", "created_at"),
         Index("idx_realtime_events_type_created", "event_type", "created_at"),
+        Index("uq_realtime_events_seq", "seq", unique=True),
+        Index("idx_realtime_events_project_seq", "project_id", "seq"),
     )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    seq = Column(BigInteger, nullable=True)
     event_type = Column(Text, nullable=False)
     payload = Column(JSONB, nullable=False, default=dict)
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,15 +1,39 @@
+from datetime import datetime, timezone
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 from redis import Redis
-from uuid import UUID
+from uuid import UUID, uuid4
 from .models import Task, Agent, AgentRun
-from .events import emit_event
-from .rqueue import get_queue
+from .events import emit_events
+from .dispatch import push_runs
+from .routing import get_router
+from .settings import settings
 
+# idx_tasks_project_ready's predicate, spelled as literals: the planner can
+# only use a partial index when the query's WHERE provably implies it, which
+# bound parameters don't once a generic plan is cached
+_READY = text("tasks.status = 'queued' AND tasks.pending_deps = 0")
 
-def orchestrator_cycle(db: Session, redis: Redis, project_id: UUID) -> dict:
+
+def orchestrator_cycle(db: Session, redis: Redis, project_id: UUID, limit: int = 10) -> dict:
     """
     Main orchestrator cycle that processes queued tasks and schedules agent runs.
 
+    Handles up to `limit` queued tasks whose prerequisites are all done,
+    highest effective priority first (see effective_priority). Agents may cap their in-flight runs
+    with config_json["max_concurrency"]; tasks routed to an agent at its cap
+    stay queued for a later cycle and the cycle moves on to the next ones.
+
+    All decisions are made in memory and written with one commit, the new
+    runs are pushed to the project's runner dispatch list with one RPUSH and
+    the cycle's events are published as one batch.
+
+    Cycles for the same project serialize on a transaction-scoped advisory
+    lock, so in-flight counts stay accurate and no task is scheduled twice;
+    cycles for different projects run in parallel. Queued tasks are also
+    selected FOR UPDATE SKIP LOCKED, so a task locked by any other writer is
+    left for a later cycle instead of being read stale.
+
     Cycle states:
     - cycle.started
     - cycle.loaded_state
@@ -20,75 +44,156 @@ def orchestrator_cycle(db: Session, redis: Redis, project_id: UUID) -> dict:
     - cycle.updated_state
     - cycle.completed
     """
-    emit_event(db, redis, project_id, "orchestrator.cycle.started", {})
-
-    # Find queued tasks ordered by priority and creation time
-    queued = (
-        db.query(Task)
-        .filter(Task.project_id == project_id)
-        .filter(Task.status == "queued")
-        .order_by(Task.priority.asc(), Task.created_at.asc())
-        .limit(10)
+    events: list[tuple[str, dict]] = [("orchestrator.cycle.started", {})]
+
+    _lock_project(db, project_id)
+
+    # Load the project's routing rules, available agents and their in-flight runs
+    router = get_router(db, redis, project_id)
+    agents = {a.name: a for a in db.query(Agent).filter(Agent.project_id == project_id).all()}
+    in_flight = dict(
+        db.query(AgentRun.agent_id, func.count(AgentRun.id))
+        .filter(AgentRun.project_id == project_id)
+        .filter(AgentRun.status == "started")
+        .group_by(AgentRun.agent_id)
         .all()
     )
 
-    # Load available agents for this project
-    agents = {a.name: a for a in db.query(Agent).filter(Agent.project_id == project_id).all()}
+    runs: list[AgentRun] = []
+    blocked: list[str] = []
+    seen: list[UUID] = []
+    deferred = 0
+    while len(seen) < limit:
+        # Find queued tasks ordered by aged priority and creation time,
+        # paging past tasks deferred earlier in this cycle
+        queued = _next_ready_tasks(db, project_id, seen, limit - len(seen))
+        if not queued:
+            break
 
-    scheduled = []
-    for task in queued:
-        # Route task to appropriate agent based on type
-        agent_name = _route_task_to_agent(task)
-        agent = agents.get(agent_name)
-
-        if not agent or not agent.is_enabled:
-            # Block task if no suitable agent available
-            task.status = "blocked"
-            db.commit()
-            emit_event(db, redis, project_id, "task.updated", {
-                "task_id": str(task.id),
-                "status": task.status
-            })
-            continue
-
-        # Create agent run
-        run = AgentRun(
-            project_id=project_id,
-            agent_id=agent.id,
-            task_id=task.id,
-            status="started"
-        )
-        db.add(run)
+        for task in queued:
+            seen.append(task.id)
 
-        # Update task status to in_progress
-        task.status = "in_progress"
-        db.commit()
-        db.refresh(run)
+            # Route task by the project's rules, then by the built-in defaults
+            agent_name = router.route(task) or _route_task_to_agent(task)
+            agent = agents.get(agent_name)
 
-        emit_event(db, redis, project_id, "agent.run.started", {
-            "run_id": str(run.id),
-            "task_id": str(task.id),
-            "agent_id": str(agent.id)
-        })
+            if not agent or not agent.is_enabled:
+                # Block task if no suitable agent available
+                task.status = "blocked"
+                blocked.append(str(task.id))
+                events.append(("task.updated", {
+                    "task_id": str(task.id),
+                    "status": task.status
+                }))
+                continue
 
-        # Enqueue job for the runner to pick up
-        q = get_queue("orchestrator")
-        q.enqueue("app.orchestrator.dispatch_to_runner", str(run.id))
+            if _agent_at_capacity(agent, in_flight.get(agent.id, 0)):
+                deferred += 1
+                continue
 
-        scheduled.append(str(run.id))
+            # Create agent run and move the task to in_progress
+            run = AgentRun(
+                id=uuid4(),
+                project_id=project_id,
+                agent_id=agent.id,
+                task_id=task.id,
+                status="started"
+            )
+            runs.append(run)
+            task.status = "in_progress"
+            in_flight[agent.id] = in_flight.get(agent.id, 0) + 1
 
-    emit_event(db, redis, project_id, "orchestrator.cycle.completed", {
+            events.append(("agent.run.started", {
+                "run_id": str(run.id),
+                "task_id": str(task.id),
+                "agent_id": str(agent.id)
+            }))
+
+    scheduled = [str(run.id) for run in runs]
+    db.add_all(runs)
+    db.commit()
+
+    # Wake the project's runners; the runs are committed, so they can claim them
+    push_runs(redis, project_id, scheduled)
+
+    events.append(("orchestrator.cycle.completed", {
         "scheduled_runs": scheduled,
-        "tasks_processed": len(queued)
-    })
+        "blocked_tasks": blocked,
+        "tasks_processed": len(seen),
+        "tasks_deferred": deferred
+    }))
+    emit_events(db, redis, project_id, events)
+
+    return {"scheduled_runs": scheduled, "tasks_processed": len(seen), "tasks_deferred": deferred}
+
+
+def effective_priority(task: Task, now: datetime) -> int:
+    """
+    Task priority improved by one level per SCHEDULER_AGING_SECONDS queued.
+
+    Lower is more urgent, so old low-priority tasks eventually overtake a
+    steady stream of new high-priority ones.
+    """
+    waited = (now - task.created_at).total_seconds()
+    return task.priority - int(waited // settings.SCHEDULER_AGING_SECONDS)
+
+
+def _next_ready_tasks(db: Session, project_id: UUID, exclude: list[UUID], limit: int) -> list[Task]:
+    """
+    Lock and return up to `limit` ready tasks, most urgent first.
+
+    Aging depends on the current time, so it can't be indexed. Within one
+    priority level the oldest task is also the most aged, though, so the
+    `limit` oldest ready tasks of each level are read off
+    idx_tasks_project_ready in index order (no sort, no full scan) and
+    ranked here; the winners are always among them. Rows locked by other
+    writers are skipped; candidates that lose stay locked only until the
+    cycle commits.
+    """
+    ready = (Task.project_id == project_id, _READY, Task.id.notin_(exclude))
+    levels = [p for (p,) in db.query(Task.priority).filter(*ready).distinct().all()]
+
+    candidates: list[Task] = []
+    for level in levels:
+        candidates += (
+            db.query(Task)
+            .filter(*ready, Task.priority == level)
+            .order_by(Task.created_at.asc(), Task.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
 
-    return {"scheduled_runs": scheduled}
+    now = datetime.now(timezone.utc)
+    candidates.sort(key=lambda t: (effective_priority(t, now), t.created_at, t.id))
+    return candidates[:limit]
+
+
+def _lock_project(db: Session, project_id: UUID) -> None:
+    """Hold the project's scheduling lock until the current transaction ends."""
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtextextended(:key, 0))"),
+        {"key": f"orchestrator:{project_id}"}
+    )
+
+
+def _agent_at_capacity(agent: Agent, running: int) -> bool:
+    """Whether an agent has reached config_json["max_concurrency"] in-flight runs."""
+    limit = (agent.config_json or {}).get("max_concurrency")
+    if limit is None:
+        return False
+    try:
+        return running >= int(limit)
+    except (TypeError, ValueError):
+        return False
 
 
 def _route_task_to_agent(task: Task) -> str:
     """
     Route a task to the appropriate agent based on task type and description.
 
+    Default used when none of the project's routing rules match.
+
     Task types:
     - code_change -> frontend or backend (based on path hints)
     - test -> qa
@@ -122,16 +227,34 @@ def _route_task_to_agent(task: Task) -> str:
     return "backend"
 
 
+def run_orchestrator_cycle(project_id: str) -> dict:
+    """RQ job that runs one orchestrator cycle for a project."""
+    from .db import SessionLocal
+    from .rqueue import get_redis
+
+    db = SessionLocal()
+    try:
+        return orchestrator_cycle(db, get_redis(), UUID(project_id))
+    finally:
+        db.close()
+
+
 def dispatch_to_runner(run_id: str) -> None:
     """
-    Placeholder: in MVP, the local runner will poll for in_progress runs and pull details via API.
-    This stub exists so RQ has a job to represent the dispatch action.
-
-    The runner will:
-    1. Poll for runs with status 'started'
-    2. Pull run details including task info
-    3. Execute the task in the appropriate repo
-    4. Stream logs back via API
-    5. Complete the run with status and summary
+    RQ job that wakes the project's runners for a new run.
+
+    Cycles push their hints directly; this still serves jobs enqueued
+    before they did. Runners long-poll
+    POST /api/projects/{project_id}/runs/claim; the first one to claim the
+    run gets it together with its task, project and agent.
     """
-    return
+    from .db import SessionLocal
+    from .rqueue import get_redis
+
+    db = SessionLocal()
+    try:
+        run = db.query(AgentRun).filter(AgentRun.id == UUID(run_id)).first()
+        if run and run.status == "started":
+            push_runs(get_redis(), run.project_id, [run.id])
+    finally:
+        db.close()
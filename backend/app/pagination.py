@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+from uuid import UUID
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Keyset:
+    """
+    Keyset (seek) pagination over a fixed sort key.
+
+    `columns` is the ordering, ending in a unique column so the key is
+    total; all of them sort in the same direction. A page is fetched with
+    WHERE (cols) > (cursor) ORDER BY cols LIMIT n, which walks the matching
+    index from where the previous page stopped instead of skipping rows, so
+    every page costs the same however deep it is.
+
+    Cursors are opaque to clients: base64 of the last row's key.
+    """
+
+    def __init__(self, *columns: InstrumentedAttribute, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def apply(self, stmt: Select, cursor: str | None, limit: int) -> Select:
+        """Restrict `stmt` to the page after `cursor`; fetches one extra row to detect the end."""
+        if cursor:
+            key = tuple_(*self.columns)
+            values = tuple_(*self._decode(cursor))
+            stmt = stmt.where(key < values if self.descending else key > values)
+        order = [c.desc() if self.descending else c.asc() for c in self.columns]
+        return stmt.order_by(*order).limit(limit + 1)
+
+    def page(self, rows: Sequence[Any], limit: int, response: Response) -> list[Any]:
+        """Trim the lookahead row and advertise the next cursor, if any, in X-Next-Cursor."""
+        rows = list(rows)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = self._encode(rows[-1])
+        return rows
+
+    def _encode(self, row: Any) -> str:
+        values = []
+        for column in self.columns:
+            value = getattr(row, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, UUID):
+                value = str(value)
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    def _decode(self, cursor: str) -> list[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("cursor does not match this listing")
+            return [self._coerce(column, value) for column, value in zip(self.columns, values)]
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    @staticmethod
+    def _coerce(column: InstrumentedAttribute, value: Any) -> Any:
+        if value is None:
+            return None
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is UUID:
+            return UUID(value)
+        if python_type is int and not isinstance(value, int):
+            raise ValueError("expected an integer")
+        return value
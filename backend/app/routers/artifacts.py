@@ -0,0 +1,71 @@
+import mimetypes
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from ..deps import get_async_db
+from ..downloads import blob_response
+from ..models import Artifact, User
+from ..schemas import ArtifactOut
+from ..storage import discard_legacy
+from .auth import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/artifacts/{artifact_id}", response_model=ArtifactOut)
+async def get_artifact(
+    artifact_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> ArtifactOut:
+    """Get an artifact by ID."""
+    artifact = await db.get(Artifact, artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return ArtifactOut.model_validate(artifact, from_attributes=True)
+
+
+@router.api_route("/artifacts/{artifact_id}/content", methods=["GET", "HEAD"])
+async def download_artifact(
+    artifact_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> Response:
+    """
+    Download an artifact's bytes.
+
+    Supports Range requests and If-None-Match against the blob's content
+    hash.
+    """
+    artifact = await db.get(Artifact, artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    meta = artifact.meta or {}
+    filename = meta.get("filename") or os.path.basename(artifact.storage_path)
+    media_type = (
+        meta.get("content_type")
+        or mimetypes.guess_type(filename)[0]
+        or "application/octet-stream"
+    )
+    return blob_response(request, artifact.storage_path, media_type, filename)
+
+
+@router.delete("/artifacts/{artifact_id}")
+async def delete_artifact(
+    artifact_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> dict:
+    """Delete an artifact, releasing its blob."""
+    artifact = await db.get(Artifact, artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    ref = artifact.storage_path
+    await db.delete(artifact)
+    await db.commit()
+    discard_legacy(ref)
+    return {"ok": True}
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
-from ..deps import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import get_async_db
 from ..models import User
 from ..schemas import LoginRequest, LoginResponse, UserOut
 from ..security import verify_password, create_session, get_user_by_session_token, revoke_session
@@ -8,9 +10,9 @@ from ..security import verify_password, create_session, get_user_by_session_toke
 router = APIRouter()
 
 
-def get_current_user(
+async def get_current_user(
     authorization: str | None = Header(default=None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Extract and validate bearer token from Authorization header."""
     if not authorization:
@@ -20,7 +22,7 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Invalid authorization format")
 
     token = authorization[7:]  # Remove "Bearer " prefix
-    user = get_user_by_session_token(db, token)
+    user = await get_user_by_session_token(db, token)
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -39,35 +41,36 @@ def get_token_from_header(authorization: str | None = Header(default=None)) -> s
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)) -> LoginResponse:
+async def login(req: LoginRequest, db: AsyncSession = Depends(get_async_db)) -> LoginResponse:
     """
     Authenticate user and create session.
 
     Returns bearer token and expiration time.
     """
-    user = db.query(User).filter(User.email == req.email).first()
+    user = await db.scalar(select(User).where(User.email == req.email))
 
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not verify_password(req.password, user.password_hash):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(verify_password, req.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token, expires_at = create_session(db, user)
+    token, expires_at = await create_session(db, user)
     return LoginResponse(token=token, expires_at=expires_at)
 
 
 @router.post("/logout")
-def logout(
+async def logout(
     token: str = Depends(get_token_from_header),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """Revoke current session token."""
-    revoke_session(db, token)
+    await revoke_session(db, token)
     return {"ok": True}
 
 
 @router.get("/me", response_model=UserOut)
-def get_me(user: User = Depends(get_current_user)) -> UserOut:
+async def get_me(user: User = Depends(get_current_user)) -> UserOut:
     """Get current authenticated user."""
     return UserOut.model_validate(user, from_attributes=True)
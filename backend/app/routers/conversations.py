@@ -1,22 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from redis import Redis
-from ..deps import get_db
-from ..rqueue import get_redis
+from redis.asyncio import Redis as AsyncRedis
+from ..deps import get_async_db
+from ..rqueue import get_async_redis
 from ..models import Conversation, Message, User
 from ..schemas import ConversationCreate, ConversationOut, MessageCreate, MessageOut
-from ..events import emit_event
+from ..events import emit_event_async
+from ..pagination import Keyset
 from .auth import get_current_user
 
 router = APIRouter()
 
+_conversations_page = Keyset(Conversation.created_at, Conversation.id, descending=True)
+_messages_page = Keyset(Message.created_at, Message.id)
+
 
 @router.post("/projects/{project_id}/conversations", response_model=ConversationOut)
-def create_conversation(
+async def create_conversation(
     project_id: UUID,
     req: ConversationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> ConversationOut:
     """Create a new conversation for a project."""
@@ -27,51 +32,53 @@ def create_conversation(
         created_by_user_id=user.id
     )
     db.add(c)
-    db.commit()
-    db.refresh(c)
+    await db.commit()
+    await db.refresh(c)
     return ConversationOut.model_validate(c, from_attributes=True)
 
 
 @router.get("/projects/{project_id}/conversations", response_model=list[ConversationOut])
-def list_conversations(
+async def list_conversations(
     project_id: UUID,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[ConversationOut]:
-    """List conversations for a project."""
-    items = (
-        db.query(Conversation)
-        .filter(Conversation.project_id == project_id)
-        .order_by(Conversation.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+    """
+    List conversations for a project, newest first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    stmt = select(Conversation).where(Conversation.project_id == project_id)
+    rows = (await db.scalars(_conversations_page.apply(stmt, cursor, limit))).all()
+    items = _conversations_page.page(rows, limit, response)
     return [ConversationOut.model_validate(x, from_attributes=True) for x in items]
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationOut)
-def get_conversation(
+async def get_conversation(
     conversation_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> ConversationOut:
     """Get a conversation by ID."""
-    c = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    c = await db.get(Conversation, conversation_id)
     if not c:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return ConversationOut.model_validate(c, from_attributes=True)
 
 
 @router.post("/conversations/{conversation_id}/messages", response_model=MessageOut)
-def create_message(
+async def create_message(
     conversation_id: UUID,
     req: MessageCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> MessageOut:
     """Add a message to a conversation."""
-    c = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    c = await db.get(Conversation, conversation_id)
     if not c:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
@@ -83,12 +90,12 @@ def create_message(
         related_task_id=req.related_task_id
     )
     db.add(m)
-    db.commit()
-    db.refresh(m)
+    await db.commit()
+    await db.refresh(m)
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, c.project_id, "conversation.message.created", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, c.project_id, "conversation.message.created", {
         "message_id": str(m.id),
         "conversation_id": str(conversation_id),
         "role": m.role
@@ -98,34 +105,36 @@ def create_message(
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=list[MessageOut])
-def list_messages(
+async def list_messages(
     conversation_id: UUID,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[MessageOut]:
-    """List messages in a conversation."""
-    messages = (
-        db.query(Message)
-        .filter(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at.asc())
-        .limit(limit)
-        .all()
-    )
+    """
+    List messages in a conversation, oldest first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    stmt = select(Message).where(Message.conversation_id == conversation_id)
+    rows = (await db.scalars(_messages_page.apply(stmt, cursor, limit))).all()
+    messages = _messages_page.page(rows, limit, response)
     return [MessageOut.model_validate(x, from_attributes=True) for x in messages]
 
 
 @router.delete("/conversations/{conversation_id}")
-def delete_conversation(
+async def delete_conversation(
     conversation_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> dict:
     """Delete a conversation and all its messages."""
-    c = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    c = await db.get(Conversation, conversation_id)
     if not c:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    db.delete(c)
-    db.commit()
+    await db.delete(c)
+    await db.commit()
     return {"ok": True}
@@ -1,68 +1,83 @@
 import hashlib
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from redis import Redis
-from ..deps import get_db
-from ..rqueue import get_redis
+from redis.asyncio import Redis as AsyncRedis
+from ..deps import get_async_db
+from ..rqueue import get_async_redis
 from ..models import Project, ProjectStateVersion, User
 from ..schemas import ProjectCreate, ProjectPatch, ProjectOut, StateCreate, StateOut
-from ..events import emit_event
+from ..events import emit_event_async
+from ..pagination import Keyset
 from .auth import get_current_user
 
 router = APIRouter()
 
+# Paged by creation, which never changes: ordering by updated_at would let a
+# project edited mid-listing jump across the cursor
+_projects_page = Keyset(Project.created_at, Project.id, descending=True)
+
 
 @router.post("", response_model=ProjectOut)
-def create_project(
+async def create_project(
     req: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> ProjectOut:
     """Create a new project."""
     p = Project(
         name=req.name,
         description=req.description,
-        default_repo_path=req.default_repo_path
+        default_repo_path=req.default_repo_path,
+        scheduling_weight=req.scheduling_weight
     )
     db.add(p)
-    db.commit()
-    db.refresh(p)
+    await db.commit()
+    await db.refresh(p)
     return ProjectOut.model_validate(p, from_attributes=True)
 
 
 @router.get("", response_model=list[ProjectOut])
-def list_projects(
-    db: Session = Depends(get_db),
+async def list_projects(
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[ProjectOut]:
-    """List all projects ordered by last update."""
-    items = db.query(Project).order_by(Project.updated_at.desc()).all()
+    """
+    List projects, newest first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    rows = (await db.scalars(_projects_page.apply(select(Project), cursor, limit))).all()
+    items = _projects_page.page(rows, limit, response)
     return [ProjectOut.model_validate(x, from_attributes=True) for x in items]
 
 
 @router.get("/{project_id}", response_model=ProjectOut)
-def get_project(
+async def get_project(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> ProjectOut:
     """Get a project by ID."""
-    p = db.query(Project).filter(Project.id == project_id).first()
+    p = await db.get(Project, project_id)
     if not p:
         raise HTTPException(status_code=404, detail="Project not found")
     return ProjectOut.model_validate(p, from_attributes=True)
 
 
 @router.patch("/{project_id}", response_model=ProjectOut)
-def patch_project(
+async def patch_project(
     project_id: UUID,
     req: ProjectPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> ProjectOut:
     """Update a project."""
-    p = db.query(Project).filter(Project.id == project_id).first()
+    p = await db.get(Project, project_id)
     if not p:
         raise HTTPException(status_code=404, detail="Project not found")
 
@@ -72,24 +87,26 @@ def patch_project(
         p.description = req.description
     if req.default_repo_path is not None:
         p.default_repo_path = req.default_repo_path
+    if req.scheduling_weight is not None:
+        p.scheduling_weight = req.scheduling_weight
 
-    db.commit()
-    db.refresh(p)
+    await db.commit()
+    await db.refresh(p)
     return ProjectOut.model_validate(p, from_attributes=True)
 
 
 @router.get("/{project_id}/state/latest", response_model=StateOut)
-def latest_state(
+async def latest_state(
     project_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> StateOut:
     """Get the latest state version for a project."""
-    v = (
-        db.query(ProjectStateVersion)
-        .filter(ProjectStateVersion.project_id == project_id)
+    v = await db.scalar(
+        select(ProjectStateVersion)
+        .where(ProjectStateVersion.project_id == project_id)
         .order_by(ProjectStateVersion.version.desc())
-        .first()
+        .limit(1)
     )
     if not v:
         raise HTTPException(status_code=404, detail="No state found")
@@ -103,25 +120,25 @@ def latest_state(
 
 
 @router.post("/{project_id}/state", response_model=StateOut)
-def create_state(
+async def create_state(
     project_id: UUID,
     req: StateCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> StateOut:
     """Create a new state version for a project."""
-    p = db.query(Project).filter(Project.id == project_id).first()
+    p = await db.get(Project, project_id)
     if not p:
         raise HTTPException(status_code=404, detail="Project not found")
 
     # Get next version number
-    latest = (
-        db.query(ProjectStateVersion.version)
-        .filter(ProjectStateVersion.project_id == project_id)
+    latest = await db.scalar(
+        select(ProjectStateVersion.version)
+        .where(ProjectStateVersion.project_id == project_id)
         .order_by(ProjectStateVersion.version.desc())
-        .first()
+        .limit(1)
     )
-    next_version = 1 if not latest else int(latest[0]) + 1
+    next_version = 1 if latest is None else int(latest) + 1
 
     # Hash content
     h = hashlib.sha256(req.content.encode("utf-8")).hexdigest()
@@ -135,11 +152,11 @@ def create_state(
         created_by_user_id=user.id
     )
     db.add(row)
-    db.commit()
+    await db.commit()
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, project_id, "project.state.updated", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, project_id, "project.state.updated", {
         "version": next_version,
         "content_hash": h
     })
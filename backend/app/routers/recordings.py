@@ -1,19 +1,39 @@
+import asyncio
+import hashlib
+import json
 import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from typing import Literal
+from fastapi import (
+    APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+from redis.exceptions import LockNotOwnedError
 from uuid import UUID
-from redis import Redis
-from ..deps import get_db
-from ..rqueue import get_redis, get_queue
+from ..db import AsyncSessionLocal
+from ..deps import get_async_db, get_db
+from ..downloads import blob_response
+from ..rqueue import get_async_redis, get_redis, get_queue
 from ..models import Recording, Conversation, User
-from ..schemas import RecordingOut
-from ..events import emit_event
-from ..storage import recording_path
+from ..schemas import RecordingOut, UploadCreate, UploadOut
+from ..events import emit_event_async
+from ..live_transcription import LiveTranscription
+from ..pagination import Keyset
+from ..transcription import apply_cached_transcript
+from ..security import get_user_by_session_token
+from ..settings import settings
+from ..storage import discard_legacy, ingest_file_async, staging_path
+from .. import uploads
+from ..uploads import UploadTooLarge, read_chunks, write_stream
 from .auth import get_current_user
 
 router = APIRouter()
 
+_recordings_page = Keyset(Recording.created_at, Recording.id, descending=True)
+
 
 def _get_extension(mime_type: str) -> str:
     """Get file extension from mime type."""
@@ -35,55 +55,291 @@ def _get_extension(mime_type: str) -> str:
 async def upload_recording(
     conversation_id: UUID,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> RecordingOut:
     """
     Upload an audio recording to a conversation.
 
-    Stores the file on disk and creates a recording record.
+    Streams the file to disk in chunks, hashing it on the way, and creates a
+    recording record. Files over RECORDING_MAX_BYTES are rejected with 413.
     """
-    c = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    c = await db.get(Conversation, conversation_id)
     if not c:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Generate recording ID and path
+    # Generate recording ID and staging path
     recording_id = uuid.uuid4()
     mime_type = file.content_type or "audio/webm"
     ext = _get_extension(mime_type)
-    path = recording_path(recording_id, ext)
+    path = staging_path(f"{recording_id}.{ext}")
 
-    # Save file to disk
+    # Stream file to disk, then move it into the blob store
+    hasher = hashlib.sha256()
     try:
-        content = await file.read()
         os.makedirs(os.path.dirname(path), exist_ok=True)
         with open(path, "wb") as f:
-            f.write(content)
+            await write_stream(read_chunks(file), f, settings.RECORDING_MAX_BYTES, hasher)
+        key = await ingest_file_async(db, path, hasher.hexdigest())
+    except UploadTooLarge:
+        await asyncio.to_thread(os.remove, path)
+        raise HTTPException(status_code=413, detail="Recording is too large")
     except Exception as e:
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
-    # Create recording record
+    return await _create_recording(db, c, recording_id, key, mime_type)
+
+
+async def _create_recording(
+    db: AsyncSession,
+    c: Conversation,
+    recording_id: UUID,
+    key: str,
+    mime_type: str
+) -> RecordingOut:
     rec = Recording(
         id=recording_id,
-        conversation_id=conversation_id,
-        storage_path=path,
-        mime_type=mime_type
+        conversation_id=c.id,
+        storage_path=key,
+        mime_type=mime_type,
+        content_hash=key
     )
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    await db.commit()
+    await db.refresh(rec)
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, c.project_id, "recording.created", {
+    await emit_event_async(db, get_async_redis(), c.project_id, "recording.created", {
         "recording_id": str(rec.id),
-        "conversation_id": str(conversation_id),
+        "conversation_id": str(c.id),
         "mime_type": mime_type
     })
+    await _enqueue_processing(rec.id)
 
     return RecordingOut.model_validate(rec, from_attributes=True)
 
 
+async def _enqueue_processing(recording_id: UUID) -> None:
+    # Probe duration and transcode for Whisper and playback
+    q = get_queue("media")
+    await asyncio.to_thread(q.enqueue, "app.media.process_recording_job", str(recording_id))
+
+
+@router.post("/conversations/{conversation_id}/uploads", response_model=UploadOut, status_code=201)
+async def create_upload(
+    conversation_id: UUID,
+    req: UploadCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> UploadOut:
+    """
+    Start a resumable recording upload of `length` bytes.
+
+    Send the bytes with PATCH /uploads/{upload_id} in as many pieces as
+    needed. An interrupted upload resumes from the offset reported by
+    HEAD /uploads/{upload_id}.
+    """
+    if not await db.get(Conversation, conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if req.length > settings.RECORDING_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Recording is too large")
+
+    upload_id = uuid.uuid4()
+    await uploads.create_upload(get_async_redis(), upload_id, conversation_id, req.mime_type, req.length)
+    response.headers["Location"] = f"/api/uploads/{upload_id}"
+    return UploadOut(upload_id=upload_id, offset=0, length=req.length)
+
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(
+    upload_id: UUID,
+    user: User = Depends(get_current_user)
+) -> Response:
+    """Report how many bytes of a resumable upload were received (Upload-Offset header)."""
+    state = await uploads.get_upload(get_async_redis(), upload_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return Response(headers={
+        "Upload-Offset": str(state["offset"]),
+        "Upload-Length": str(state["length"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.patch("/uploads/{upload_id}", response_model=UploadOut)
+async def append_upload(
+    upload_id: UUID,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> UploadOut:
+    """
+    Append the request body to a resumable upload at Upload-Offset.
+
+    The offset must equal the bytes received so far (409 otherwise). Progress
+    is saved chunk by chunk, so a dropped connection loses at most one
+    chunk. The request that delivers the last byte creates the recording
+    and returns it. Returns 410 if the received bytes were lost from disk.
+    """
+    redis = get_async_redis()
+    state = await uploads.get_upload(redis, upload_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    lock = await uploads.acquire_lock(redis, upload_id)
+    if not lock:
+        raise HTTPException(status_code=409, detail="Upload is busy")
+
+    try:
+        # Re-read under the lock: the previous writer may have just finished
+        state = await uploads.get_upload(redis, upload_id)
+        if not state:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if upload_offset != state["offset"]:
+            raise HTTPException(status_code=409, detail=f"Upload-Offset must be {state['offset']}")
+
+        async def save_progress(written: int) -> None:
+            await uploads.set_offset(redis, upload_id, upload_offset + written, lock)
+
+        path = uploads.partial_path(upload_id)
+        try:
+            f = open(path, "r+b")
+        except FileNotFoundError:
+            # The received bytes were removed from disk; the upload can't resume
+            await uploads.discard_upload(redis, upload_id)
+            raise HTTPException(status_code=410, detail="Upload data is gone; start a new upload")
+        with f:
+            # Drop bytes written after the last saved offset by an interrupted request
+            await asyncio.to_thread(f.truncate, upload_offset)
+            f.seek(upload_offset)
+            try:
+                written = await write_stream(
+                    request.stream(), f, state["length"] - upload_offset, on_progress=save_progress
+                )
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail="Body exceeds the declared upload length")
+            except ClientDisconnect:
+                return UploadOut(upload_id=upload_id, offset=upload_offset, length=state["length"])
+            except LockNotOwnedError:
+                # Stalled past UPLOAD_LOCK_SECONDS; another request may own the upload now
+                raise HTTPException(status_code=409, detail="Upload is busy")
+
+        offset = upload_offset + written
+        response.headers["Upload-Offset"] = str(offset)
+        if offset < state["length"]:
+            return UploadOut(upload_id=upload_id, offset=offset, length=state["length"])
+
+        c = await db.get(Conversation, state["conversation_id"])
+        if not c:
+            await uploads.discard_upload(redis, upload_id)
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        key = await ingest_file_async(db, path)
+        await redis.delete(uploads.upload_key(upload_id))
+        rec = await _create_recording(db, c, uuid.uuid4(), key, state["mime_type"])
+        return UploadOut(upload_id=upload_id, offset=offset, length=state["length"], recording=rec)
+    finally:
+        await uploads.release_lock(lock)
+
+
+@router.delete("/uploads/{upload_id}")
+async def cancel_upload(
+    upload_id: UUID,
+    user: User = Depends(get_current_user)
+) -> dict:
+    """Abandon a resumable upload and delete what was received."""
+    await uploads.discard_upload(get_async_redis(), upload_id)
+    return {"ok": True}
+
+
+@router.websocket("/conversations/{conversation_id}/recordings/live")
+async def live_recording(
+    ws: WebSocket,
+    conversation_id: UUID,
+    token: str,
+    language: str | None = None
+) -> None:
+    """
+    Record a voice note over a WebSocket and transcribe it while it streams.
+
+    The client sends binary frames of 16 kHz mono 16-bit PCM and a text frame
+    {"type": "end"} when done. Each pause in speech is decoded right away and
+    published as a recording.transcript.partial event; on end the stitched
+    transcript is stored on the recording, posted to the conversation and
+    sent back as {"type": "transcript.final"}. A client that disconnects
+    without ending keeps whatever was transcribed.
+    """
+    await ws.accept()
+
+    async with AsyncSessionLocal() as db:
+        user = await get_user_by_session_token(db, token)
+        if not user or not user.is_active:
+            await ws.close(code=4401)
+            return
+        c = await db.get(Conversation, conversation_id)
+        if not c:
+            await ws.close(code=4404)
+            return
+
+        recording_id = uuid.uuid4()
+        # Captured to local disk, then moved into the blob store when done
+        path = staging_path(f"{recording_id}.live.wav")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rec = Recording(
+            id=recording_id,
+            conversation_id=conversation_id,
+            storage_path=path,
+            mime_type="audio/wav"
+        )
+        db.add(rec)
+        await db.commit()
+        await db.refresh(rec)
+
+        redis = get_async_redis()
+        await emit_event_async(db, redis, c.project_id, "recording.created", {
+            "recording_id": str(rec.id),
+            "conversation_id": str(conversation_id),
+            "mime_type": rec.mime_type,
+            "live": True
+        })
+        project_id = c.project_id
+
+    await ws.send_text(json.dumps({
+        "type": "recording.created",
+        "recording": RecordingOut.model_validate(rec, from_attributes=True).model_dump(mode="json")
+    }))
+
+    live = await LiveTranscription.start(redis, rec, project_id, language)
+    connected = True
+    try:
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if msg.get("bytes"):
+                await live.feed(msg["bytes"])
+            elif msg.get("text") and json.loads(msg["text"]).get("type") == "end":
+                break
+    except WebSocketDisconnect:
+        connected = False
+    except Exception:
+        await live.abort()
+        await ws.close(code=1011)
+        return
+
+    async with AsyncSessionLocal() as db:
+        result = await live.finish(db)
+    await _enqueue_processing(rec.id)
+    if connected:
+        await ws.send_text(json.dumps({"type": "transcript.final", **result}))
+        await ws.close()
+
+
 @router.get("/recordings/{recording_id}", response_model=RecordingOut)
 def get_recording(
     recording_id: UUID,
@@ -97,21 +353,55 @@ def get_recording(
     return RecordingOut.model_validate(rec, from_attributes=True)
 
 
+@router.api_route("/recordings/{recording_id}/content", methods=["GET", "HEAD"])
+async def download_recording(
+    recording_id: UUID,
+    request: Request,
+    variant: Literal["playback", "original", "normalized"] = "playback",
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> Response:
+    """
+    Download a recording's audio.
+
+    `playback` serves the compact Opus copy (falling back to the stored file
+    until processing finished), `original` the stored file and `normalized`
+    the 16 kHz WAV. Supports Range requests for seeking and If-None-Match
+    revalidation against an ETag derived from the audio's content hash.
+    """
+    rec = await db.get(Recording, recording_id)
+    if not rec:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    if variant == "normalized":
+        ref, media_type = rec.normalized_path, "audio/wav"
+    elif variant == "playback" and rec.playback_path:
+        ref, media_type = rec.playback_path, "audio/ogg"
+    else:
+        ref, media_type = rec.storage_path, rec.mime_type
+    if not ref:
+        raise HTTPException(status_code=404, detail="Recording has no such variant yet")
+
+    return blob_response(request, ref, media_type, filename=f"{rec.id}.{_get_extension(media_type)}")
+
+
 @router.get("/conversations/{conversation_id}/recordings", response_model=list[RecordingOut])
 def list_recordings(
     conversation_id: UUID,
-    limit: int = 50,
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ) -> list[RecordingOut]:
-    """List recordings for a conversation."""
-    items = (
-        db.query(Recording)
-        .filter(Recording.conversation_id == conversation_id)
-        .order_by(Recording.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+    """
+    List recordings for a conversation, newest first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    stmt = select(Recording).where(Recording.conversation_id == conversation_id)
+    rows = db.scalars(_recordings_page.apply(stmt, cursor, limit)).all()
+    items = _recordings_page.page(rows, limit, response)
     return [RecordingOut.model_validate(x, from_attributes=True) for x in items]
 
 
@@ -124,7 +414,9 @@ def transcribe_recording(
     """
     Trigger transcription for a recording.
 
-    Enqueues a transcription job to be processed by the transcription worker.
+    Recordings whose audio was transcribed before are filled in from the
+    transcription cache right away; anything else is enqueued for the
+    transcription worker.
     """
     rec = db.query(Recording).filter(Recording.id == recording_id).first()
     if not rec:
@@ -133,6 +425,9 @@ def transcribe_recording(
     if rec.transcript_text:
         return {"accepted": False, "reason": "Already transcribed"}
 
+    if apply_cached_transcript(db, get_redis(), rec):
+        return {"accepted": True, "cached": True}
+
     # Enqueue transcription job
     q = get_queue("transcription")
     q.enqueue("app.transcription.transcribe_recording_job", str(recording_id))
@@ -146,18 +441,21 @@ def delete_recording(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ) -> dict:
-    """Delete a recording and its file."""
+    """
+    Delete a recording.
+
+    Its blobs are released; they are reclaimed once no other recording or
+    artifact shares them.
+    """
     rec = db.query(Recording).filter(Recording.id == recording_id).first()
     if not rec:
         raise HTTPException(status_code=404, detail="Recording not found")
 
-    # Delete file from disk
-    try:
-        if os.path.exists(rec.storage_path):
-            os.remove(rec.storage_path)
-    except Exception:
-        pass  # Continue even if file deletion fails
-
+    refs = [rec.storage_path, rec.normalized_path, rec.playback_path]
     db.delete(rec)
     db.commit()
+
+    # Files from before the blob store aren't shared and go right away
+    for ref in refs:
+        discard_legacy(ref)
     return {"ok": True}
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from uuid import UUID
+from ..deps import get_db
+from ..models import RoutingRule, User
+from ..routing import bump_version, validate_rule
+from ..rqueue import get_redis
+from ..schemas import RoutingRuleCreate, RoutingRulePatch, RoutingRuleOut
+from .auth import get_current_user
+
+router = APIRouter()
+
+
+def _validate(pattern: str | None, pattern_is_regex: bool) -> None:
+    try:
+        validate_rule(pattern, pattern_is_regex)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/projects/{project_id}/routing-rules", response_model=RoutingRuleOut)
+def create_routing_rule(
+    project_id: UUID,
+    req: RoutingRuleCreate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+) -> RoutingRuleOut:
+    """Create a rule routing matching tasks to an agent."""
+    _validate(req.pattern, req.pattern_is_regex)
+
+    r = RoutingRule(project_id=project_id, **req.model_dump())
+    db.add(r)
+    db.commit()
+    db.refresh(r)
+    bump_version(get_redis(), project_id)
+    return RoutingRuleOut.model_validate(r, from_attributes=True)
+
+
+@router.get("/projects/{project_id}/routing-rules", response_model=list[RoutingRuleOut])
+def list_routing_rules(
+    project_id: UUID,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+) -> list[RoutingRuleOut]:
+    """List a project's routing rules in evaluation order."""
+    items = (
+        db.query(RoutingRule)
+        .filter(RoutingRule.project_id == project_id)
+        .order_by(RoutingRule.position.asc(), RoutingRule.created_at.asc())
+        .all()
+    )
+    return [RoutingRuleOut.model_validate(x, from_attributes=True) for x in items]
+
+
+@router.patch("/routing-rules/{rule_id}", response_model=RoutingRuleOut)
+def patch_routing_rule(
+    rule_id: UUID,
+    req: RoutingRulePatch,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+) -> RoutingRuleOut:
+    """
+    Update a routing rule.
+
+    Conditions sent as null are cleared; omitted fields are left unchanged.
+    """
+    r = db.query(RoutingRule).filter(RoutingRule.id == rule_id).first()
+    if not r:
+        raise HTTPException(status_code=404, detail="Routing rule not found")
+
+    changes = req.model_dump(exclude_unset=True)
+    for field in ("agent_name", "position", "pattern_is_regex", "is_enabled"):
+        if field in changes and changes[field] is None:
+            raise HTTPException(status_code=400, detail=f"{field} cannot be null")
+    _validate(changes.get("pattern", r.pattern), changes.get("pattern_is_regex", r.pattern_is_regex))
+
+    for field, value in changes.items():
+        setattr(r, field, value)
+    r.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(r)
+    bump_version(get_redis(), r.project_id)
+    return RoutingRuleOut.model_validate(r, from_attributes=True)
+
+
+@router.delete("/routing-rules/{rule_id}")
+def delete_routing_rule(
+    rule_id: UUID,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+) -> dict:
+    """Delete a routing rule."""
+    r = db.query(RoutingRule).filter(RoutingRule.id == rule_id).first()
+    if not r:
+        raise HTTPException(status_code=404, detail="Routing rule not found")
+
+    project_id = r.project_id
+    db.delete(r)
+    db.commit()
+    bump_version(get_redis(), project_id)
+    return {"ok": True}
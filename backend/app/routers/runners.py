@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from ..deps import get_async_db
+from ..dispatch import build_run_envelope, claim_next_run, dispatch_key, resolve_runner_projects
+from ..rqueue import get_async_redis
+from ..models import AgentRun, User
+from ..schemas import RunClaimRequest, RunDispatchOut, RunHeartbeatRequest, RunLeaseOut, RunnerClaimRequest
+from ..settings import settings
+from .auth import get_current_user
+
+router = APIRouter()
+
+
+@router.post(
+    "/projects/{project_id}/runs/claim",
+    response_model=RunDispatchOut,
+    responses={204: {"description": "No run could be claimed before the wait expired"}},
+)
+async def claim_run(
+    project_id: UUID,
+    req: RunClaimRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> RunDispatchOut | Response:
+    """
+    Claim the next started run in a project, waiting up to `wait` seconds.
+
+    The run is leased to `runner_id` until it completes or the runner stops
+    sending heartbeats. Returns the run together with its task, project and
+    agent, or 204 if nothing was claimable in time.
+    """
+    return await _claim_or_wait(db, [project_id], req.runner_id, req.wait)
+
+
+@router.post(
+    "/runs/claim",
+    response_model=RunDispatchOut,
+    responses={204: {"description": "No run could be claimed before the wait expired"}},
+)
+async def claim_run_for_runner(
+    req: RunnerClaimRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> RunDispatchOut | Response:
+    """
+    Claim the next started run across every project a runner serves.
+
+    Runners either list their project_ids or send their repo_roots, in which
+    case they serve all projects whose default_repo_path lies inside one of
+    them. One request covers all of those projects, replacing a poll loop
+    per project.
+    """
+    project_ids = await resolve_runner_projects(db, req.project_ids, req.repo_roots)
+    return await _claim_or_wait(db, project_ids, req.runner_id, req.wait)
+
+
+async def _claim_or_wait(
+    db: AsyncSession,
+    project_ids: list[UUID],
+    runner_id: str,
+    wait: float
+) -> RunDispatchOut | Response:
+    redis = get_async_redis()
+    keys = [dispatch_key(p) for p in project_ids]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, settings.RUNNER_DISPATCH_MAX_WAIT_SECONDS)
+
+    while True:
+        run = await claim_next_run(db, project_ids, runner_id)
+        if run:
+            return await build_run_envelope(db, run)
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return Response(status_code=204)
+
+        # Don't pin a pooled DB connection while blocked on Redis
+        await db.close()
+        if not keys:
+            await asyncio.sleep(remaining)
+            return Response(status_code=204)
+        if not await redis.blpop(keys, timeout=remaining):
+            return Response(status_code=204)
+
+
+@router.post("/runs/{run_id}/heartbeat", response_model=RunLeaseOut)
+async def heartbeat_run(
+    run_id: UUID,
+    req: RunHeartbeatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> RunLeaseOut:
+    """
+    Renew the lease on a claimed run.
+
+    Returns 409 once the lease is lost (the run finished or was requeued),
+    in which case the runner should stop working on it.
+    """
+    lease_expires_at = await db.scalar(
+        update(AgentRun)
+        .where(
+            AgentRun.id == run_id,
+            AgentRun.status == "started",
+            AgentRun.claimed_by == req.runner_id,
+        )
+        .values(lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.RUN_LEASE_SECONDS))
+        .returning(AgentRun.lease_expires_at)
+    )
+    await db.commit()
+    if lease_expires_at is None:
+        raise HTTPException(status_code=409, detail="Run is not leased to this runner")
+
+    return RunLeaseOut(run_id=run_id, claimed_by=req.runner_id, lease_expires_at=lease_expires_at)
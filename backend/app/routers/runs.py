@@ -1,57 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
 from datetime import datetime, timezone
-from redis import Redis
-from ..deps import get_db
-from ..rqueue import get_redis
+from redis.asyncio import Redis as AsyncRedis
+from ..deps import get_async_db
+from ..rqueue import get_async_redis, get_queue
 from ..models import AgentRun, AgentRunLog, Task, User
-from ..schemas import AgentRunOut, RunLogCreate, RunLogOut, RunCompleteRequest
-from ..events import emit_event
-from ..orchestrator import orchestrator_cycle
+from ..schemas import AgentRunOut, RunLogCreate, RunLogOut, RunLogBatchOut, RunCompleteRequest
+from ..events import emit_event_async
+from ..pagination import Keyset
+from ..dag import announce_unlocked, on_status_change
 from ..schemas import OrchestratorRunRequest, OrchestratorRunResponse
+from ..settings import settings
 from .auth import get_current_user
 
 router = APIRouter()
 
+_runs_page = Keyset(AgentRun.started_at, AgentRun.id, descending=True)
+
 
 @router.get("/projects/{project_id}/runs", response_model=list[AgentRunOut])
-def list_runs(
+async def list_runs(
     project_id: UUID,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[AgentRunOut]:
-    """List agent runs for a project."""
-    items = (
-        db.query(AgentRun)
-        .filter(AgentRun.project_id == project_id)
-        .order_by(AgentRun.started_at.desc())
-        .limit(limit)
-        .all()
-    )
+    """
+    List agent runs for a project, most recent first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    stmt = select(AgentRun).where(AgentRun.project_id == project_id)
+    rows = (await db.scalars(_runs_page.apply(stmt, cursor, limit))).all()
+    items = _runs_page.page(rows, limit, response)
     return [AgentRunOut.model_validate(x, from_attributes=True) for x in items]
 
 
 @router.get("/runs/{run_id}", response_model=AgentRunOut)
-def get_run(
+async def get_run(
     run_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> AgentRunOut:
     """Get an agent run by ID."""
-    r = db.query(AgentRun).filter(AgentRun.id == run_id).first()
+    r = await db.get(AgentRun, run_id)
     if not r:
         raise HTTPException(status_code=404, detail="Run not found")
     return AgentRunOut.model_validate(r, from_attributes=True)
 
 
 @router.get("/runs/{run_id}/logs", response_model=list[RunLogOut])
-def list_run_logs(
+async def list_run_logs(
     run_id: UUID,
     after_seq: int = Query(default=0),
     limit: int = 2000,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[RunLogOut]:
     """
@@ -59,22 +67,21 @@ def list_run_logs(
 
     Use after_seq for pagination to get logs after a specific sequence number.
     """
-    logs = (
-        db.query(AgentRunLog)
-        .filter(AgentRunLog.run_id == run_id)
-        .filter(AgentRunLog.seq > after_seq)
+    logs = (await db.scalars(
+        select(AgentRunLog)
+        .where(AgentRunLog.run_id == run_id)
+        .where(AgentRunLog.seq > after_seq)
         .order_by(AgentRunLog.seq.asc())
         .limit(limit)
-        .all()
-    )
+    )).all()
     return [RunLogOut.model_validate(x, from_attributes=True) for x in logs]
 
 
 @router.post("/runs/{run_id}/logs", response_model=RunLogOut)
-def append_run_log(
+async def append_run_log(
     run_id: UUID,
     req: RunLogCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> RunLogOut:
     """
@@ -82,7 +89,7 @@ def append_run_log(
 
     Used by the runner to stream logs back to the system.
     """
-    r = db.query(AgentRun).filter(AgentRun.id == run_id).first()
+    r = await db.get(AgentRun, run_id)
     if not r:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -93,12 +100,12 @@ def append_run_log(
         message=req.message
     )
     db.add(log)
-    db.commit()
-    db.refresh(log)
+    await db.commit()
+    await db.refresh(log)
 
     # Emit realtime event for log streaming
-    redis: Redis = get_redis()
-    emit_event(db, redis, r.project_id, "agent.run.log.appended", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, r.project_id, "agent.run.log.appended", {
         "run_id": str(run_id),
         "seq": req.seq,
         "stream": req.stream,
@@ -108,48 +115,119 @@ def append_run_log(
     return RunLogOut.model_validate(log, from_attributes=True)
 
 
+@router.post("/runs/{run_id}/logs/batch", response_model=RunLogBatchOut)
+async def append_run_logs(
+    run_id: UUID,
+    req: list[RunLogCreate],
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> RunLogBatchOut:
+    """
+    Append a batch of log entries to an agent run.
+
+    All entries are written with one multi-row insert and announced with a
+    single realtime event. Entries whose seq already exists are skipped, so
+    the runner can safely retry a flush that failed midway.
+    """
+    if len(req) > settings.RUN_LOG_BATCH_MAX_ENTRIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many log entries (max {settings.RUN_LOG_BATCH_MAX_ENTRIES})"
+        )
+
+    r = await db.get(AgentRun, run_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if not req:
+        return RunLogBatchOut(run_id=run_id, received=0, inserted=0, last_seq=None)
+
+    stmt = (
+        pg_insert(AgentRunLog)
+        .values([
+            {"run_id": run_id, "seq": x.seq, "stream": x.stream, "message": x.message}
+            for x in req
+        ])
+        .on_conflict_do_nothing(constraint="uq_run_seq")
+        .returning(AgentRunLog.seq)
+    )
+    inserted = set((await db.scalars(stmt)).all())
+    await db.commit()
+
+    entries = [
+        {"seq": x.seq, "stream": x.stream, "message": x.message}
+        for x in req
+        if x.seq in inserted
+    ]
+
+    # Emit one coalesced realtime event for the whole batch
+    if entries:
+        redis: AsyncRedis = get_async_redis()
+        await emit_event_async(db, redis, r.project_id, "agent.run.logs.appended", {
+            "run_id": str(run_id),
+            "first_seq": entries[0]["seq"],
+            "last_seq": entries[-1]["seq"],
+            "entries": entries
+        })
+
+    return RunLogBatchOut(
+        run_id=run_id,
+        received=len(req),
+        inserted=len(entries),
+        last_seq=max(x.seq for x in req)
+    )
+
+
 @router.post("/runs/{run_id}/complete", response_model=AgentRunOut)
-def complete_run(
+async def complete_run(
     run_id: UUID,
     req: RunCompleteRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> AgentRunOut:
     """
     Mark an agent run as complete.
 
     Updates the run status and optionally updates the associated task.
+    Runners pass their runner_id so a run that was requeued after their
+    lease lapsed can't be completed twice.
     """
-    r = db.query(AgentRun).filter(AgentRun.id == run_id).first()
+    r = await db.get(AgentRun, run_id, with_for_update=True)
     if not r:
         raise HTTPException(status_code=404, detail="Run not found")
+    if req.runner_id and r.claimed_by != req.runner_id:
+        raise HTTPException(status_code=409, detail="Run is not leased to this runner")
 
     r.status = req.status
+    r.lease_expires_at = None
     r.exit_code = req.exit_code
     r.summary = req.summary
     r.finished_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(r)
-
-    # Update associated task if exists
-    if r.task_id:
-        task = db.query(Task).filter(Task.id == r.task_id).first()
-        if task:
-            if req.status == "completed" and req.exit_code == 0:
-                task.status = "needs_review"
-            elif req.status == "failed":
-                task.status = "failed"
-            task.updated_at = datetime.now(timezone.utc)
-            db.commit()
+    await db.commit()
+    await db.refresh(r)
+
+    # Update associated task if exists, unlocking tasks that depend on it
+    unlocked = []
+    task = await db.get(Task, r.task_id, with_for_update=True, populate_existing=True) if r.task_id else None
+    if task:
+        old_status = task.status
+        if req.status == "completed" and req.exit_code == 0:
+            task.status = "needs_review"
+        elif req.status == "failed":
+            task.status = "failed"
+        task.updated_at = datetime.now(timezone.utc)
+        unlocked = await on_status_change(db, task, old_status)
+        await db.commit()
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, r.project_id, "agent.run.completed", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, r.project_id, "agent.run.completed", {
         "run_id": str(run_id),
         "status": r.status,
         "exit_code": r.exit_code,
         "summary": r.summary
     })
+    await announce_unlocked(db, redis, r.project_id, unlocked)
 
     return AgentRunOut.model_validate(r, from_attributes=True)
 
@@ -158,21 +236,21 @@ def complete_run(
 def trigger_orchestrator(
     project_id: UUID,
     req: OrchestratorRunRequest,
-    db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ) -> OrchestratorRunResponse:
     """
     Trigger an orchestrator cycle for a project.
 
-    Processes queued tasks and schedules agent runs.
+    The cycle runs on the orchestrator queue, where any number of workers
+    can schedule different projects in parallel. Returns the job id as the
+    cycle id.
     """
-    redis: Redis = get_redis()
-
     try:
-        result = orchestrator_cycle(db, redis, project_id)
+        q = get_queue("orchestrator")
+        job = q.enqueue("app.orchestrator.run_orchestrator_cycle", str(project_id))
         return OrchestratorRunResponse(
             accepted=True,
-            cycle_id=None  # Could add cycle tracking later
+            cycle_id=job.id
         )
     except Exception as e:
         return OrchestratorRunResponse(
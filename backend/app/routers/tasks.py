@@ -1,26 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from datetime import datetime, timezone
-from redis import Redis
-from ..deps import get_db
-from ..rqueue import get_redis
+from redis.asyncio import Redis as AsyncRedis
+from ..deps import get_async_db
+from ..rqueue import get_async_redis
 from ..models import Task, TaskEvent, User
-from ..schemas import TaskCreate, TaskOut, TaskPatch, TaskEventCreate, TaskEventOut
-from ..events import emit_event
+from ..schemas import TaskCreate, TaskOut, TaskPatch, TaskDependencyCreate, TaskEventCreate, TaskEventOut
+from ..events import emit_event_async
+from ..pagination import Keyset
+from ..dag import (
+    DependencyError, add_dependency, announce_unlocked, list_prerequisites, on_status_change, remove_dependency
+)
 from .auth import get_current_user
 
 router = APIRouter()
 
+# Paged by creation, which never changes; priority can be patched while a
+# client is paging, which would move a task across the cursor
+_tasks_page = Keyset(Task.created_at, Task.id)
+_task_events_page = Keyset(TaskEvent.created_at, TaskEvent.id, descending=True)
+
 
 @router.post("/projects/{project_id}/tasks", response_model=TaskOut)
-def create_task(
+async def create_task(
     project_id: UUID,
     req: TaskCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> TaskOut:
-    """Create a new task for a project."""
+    """
+    Create a new task for a project.
+
+    Tasks listed in depends_on must finish before this one is scheduled.
+    """
     t = Task(
         project_id=project_id,
         title=req.title,
@@ -32,12 +46,19 @@ def create_task(
         created_by_user_id=user.id
     )
     db.add(t)
-    db.commit()
-    db.refresh(t)
+    await db.flush()
+    for depends_on_task_id in req.depends_on:
+        try:
+            await add_dependency(db, t, depends_on_task_id)
+        except DependencyError as e:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    await db.refresh(t)
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, project_id, "task.created", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, project_id, "task.created", {
         "task_id": str(t.id),
         "title": t.title,
         "status": t.status,
@@ -48,50 +69,57 @@ def create_task(
 
 
 @router.get("/projects/{project_id}/tasks", response_model=list[TaskOut])
-def list_tasks(
+async def list_tasks(
     project_id: UUID,
+    response: Response,
     status: str | None = Query(default=None),
-    limit: int = 200,
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=200, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[TaskOut]:
     """
-    List tasks for a project.
+    List tasks for a project, oldest first.
 
-    Filter by status (comma-separated list).
+    Filter by status (comma-separated list). Pass the X-Next-Cursor header
+    of one page as `cursor` to get the next; sort by priority once all
+    pages are in.
     """
-    q = db.query(Task).filter(Task.project_id == project_id)
+    q = select(Task).where(Task.project_id == project_id)
 
     if status:
         statuses = [x.strip() for x in status.split(",") if x.strip()]
-        q = q.filter(Task.status.in_(statuses))
+        q = q.where(Task.status.in_(statuses))
 
-    items = q.order_by(Task.priority.asc(), Task.created_at.asc()).limit(limit).all()
+    rows = (await db.scalars(_tasks_page.apply(q, cursor, limit))).all()
+    items = _tasks_page.page(rows, limit, response)
     return [TaskOut.model_validate(x, from_attributes=True) for x in items]
 
 
 @router.get("/tasks/{task_id}", response_model=TaskOut)
-def get_task(
+async def get_task(
     task_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> TaskOut:
     """Get a task by ID."""
-    t = db.query(Task).filter(Task.id == task_id).first()
+    t = await db.get(Task, task_id)
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
     return TaskOut.model_validate(t, from_attributes=True)
 
 
 @router.patch("/tasks/{task_id}", response_model=TaskOut)
-def patch_task(
+async def patch_task(
     task_id: UUID,
     req: TaskPatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> TaskOut:
     """Update a task."""
-    t = db.query(Task).filter(Task.id == task_id).first()
+    # Lock the row before reading its status: two concurrent patches that
+    # both saw the old status would each adjust the dependents' counts
+    t = await db.get(Task, task_id, with_for_update=True, populate_existing=True)
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -103,33 +131,95 @@ def patch_task(
         t.type = req.type
     if req.priority is not None:
         t.priority = req.priority
+    old_status = t.status
     if req.status is not None:
         t.status = req.status
 
     t.updated_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(t)
+    unlocked = await on_status_change(db, t, old_status)
+    await db.commit()
+    await db.refresh(t)
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, t.project_id, "task.updated", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, t.project_id, "task.updated", {
         "task_id": str(t.id),
         "status": t.status,
         "updated_at": t.updated_at.isoformat()
     })
+    await announce_unlocked(db, redis, t.project_id, unlocked)
+
+    return TaskOut.model_validate(t, from_attributes=True)
+
+
+@router.get("/tasks/{task_id}/dependencies", response_model=list[TaskOut])
+async def list_task_dependencies(
+    task_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> list[TaskOut]:
+    """List the tasks this task waits for."""
+    items = await list_prerequisites(db, task_id)
+    return [TaskOut.model_validate(x, from_attributes=True) for x in items]
+
+
+@router.post("/tasks/{task_id}/dependencies", response_model=TaskOut)
+async def add_task_dependency(
+    task_id: UUID,
+    req: TaskDependencyCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> TaskOut:
+    """
+    Make a task wait for another task in the same project.
 
+    Returns 400 if the edge would create a cycle.
+    """
+    t = await db.get(Task, task_id)
+    if not t:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    try:
+        await add_dependency(db, t, req.depends_on_task_id)
+    except DependencyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return TaskOut.model_validate(t, from_attributes=True)
+
+
+@router.delete("/tasks/{task_id}/dependencies/{depends_on_task_id}", response_model=TaskOut)
+async def remove_task_dependency(
+    task_id: UUID,
+    depends_on_task_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+) -> TaskOut:
+    """Remove a dependency edge."""
+    t = await db.get(Task, task_id)
+    if not t:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if not await remove_dependency(db, t, depends_on_task_id):
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    await db.commit()
+
+    if t.status == "queued" and t.pending_deps == 0:
+        await announce_unlocked(db, get_async_redis(), t.project_id, [
+            {"task_id": str(t.id), "status": t.status, "pending_deps": 0}
+        ])
     return TaskOut.model_validate(t, from_attributes=True)
 
 
 @router.post("/tasks/{task_id}/events", response_model=TaskEventOut)
-def append_task_event(
+async def append_task_event(
     task_id: UUID,
     req: TaskEventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> TaskEventOut:
     """Append an event to a task's audit trail."""
-    t = db.query(Task).filter(Task.id == task_id).first()
+    t = await db.get(Task, task_id)
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -139,12 +229,12 @@ def append_task_event(
         payload=req.payload
     )
     db.add(ev)
-    db.commit()
-    db.refresh(ev)
+    await db.commit()
+    await db.refresh(ev)
 
     # Emit realtime event
-    redis: Redis = get_redis()
-    emit_event(db, redis, t.project_id, "task.event.appended", {
+    redis: AsyncRedis = get_async_redis()
+    await emit_event_async(db, redis, t.project_id, "task.event.appended", {
         "task_id": str(task_id),
         "event_type": req.event_type
     })
@@ -153,18 +243,20 @@ def append_task_event(
 
 
 @router.get("/tasks/{task_id}/events", response_model=list[TaskEventOut])
-def list_task_events(
+async def list_task_events(
     task_id: UUID,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ) -> list[TaskEventOut]:
-    """List events for a task."""
-    events = (
-        db.query(TaskEvent)
-        .filter(TaskEvent.task_id == task_id)
-        .order_by(TaskEvent.created_at.desc())
-        .limit(limit)
-        .all()
-    )
+    """
+    List events for a task, newest first.
+
+    Pass the X-Next-Cursor header of one page as `cursor` to get the next.
+    """
+    stmt = select(TaskEvent).where(TaskEvent.task_id == task_id)
+    rows = (await db.scalars(_task_events_page.apply(stmt, cursor, limit))).all()
+    events = _task_events_page.page(rows, limit, response)
     return [TaskEventOut.model_validate(e, from_attributes=True) for e in events]
@@ -0,0 +1,160 @@
+import fnmatch
+import re
+import threading
+from dataclasses import dataclass
+from uuid import UUID
+from redis import Redis
+from sqlalchemy.orm import Session
+from .models import RoutingRule, Task
+
+
+# Bumped whenever a project's rules change; compiled routers are rebuilt on mismatch
+VERSION_KEY = "routing:version:{project_id}"
+
+# Tokens in a task description that look like file paths ("src/app.py", "*.tsx")
+_PATH_TOKEN = re.compile(r"[\w.\-*/]*[/.][\w.\-*/]+")
+
+
+def version_key(project_id: UUID) -> str:
+    return VERSION_KEY.format(project_id=project_id)
+
+
+def bump_version(redis: Redis, project_id: UUID) -> None:
+    """Invalidate every process's compiled router for a project."""
+    redis.incr(version_key(project_id))
+
+
+def validate_rule(pattern: str | None, pattern_is_regex: bool) -> None:
+    """Raise ValueError if a rule's pattern can't be compiled."""
+    if pattern and pattern_is_regex:
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}") from e
+
+
+def _trie_regex(words: list[str]) -> str:
+    """
+    Build a regex matching any of `words`, factored by common prefix.
+
+    Matching cost at each position grows with keyword length rather than
+    keyword count, and the longest keyword starting there is preferred.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+@dataclass(frozen=True)
+class _Rule:
+    agent_name: str
+    task_type: str | None
+    keyword: str | None
+    regex: re.Pattern | None
+    glob: re.Pattern | None
+    min_priority: int | None
+    max_priority: int | None
+
+
+class CompiledRouter:
+    """
+    A project's routing rules compiled into one matcher.
+
+    All keyword conditions are found with a single scan of the task text
+    using one prefix-factored regex; regex and path-glob conditions are
+    precompiled and only evaluated for rules whose cheaper conditions
+    already match. Rules are tried in position order and the first full
+    match wins.
+    """
+
+    def __init__(self, rules: list[RoutingRule]):
+        self.rules: list[_Rule] = []
+        keywords: set[str] = set()
+        for r in rules:
+            keyword = r.pattern.lower() if r.pattern and not r.pattern_is_regex else None
+            if keyword:
+                keywords.add(keyword)
+            self.rules.append(_Rule(
+                agent_name=r.agent_name,
+                task_type=r.task_type,
+                keyword=keyword,
+                regex=re.compile(r.pattern, re.IGNORECASE) if r.pattern and r.pattern_is_regex else None,
+                glob=re.compile(fnmatch.translate(r.path_glob)) if r.path_glob else None,
+                min_priority=r.min_priority,
+                max_priority=r.max_priority,
+            ))
+
+        # A zero-width lookahead reports the longest keyword at every offset,
+        # so overlapping keywords are all found in one pass; shorter keywords
+        # that start at the same offset are exactly its prefixes.
+        ordered = sorted(keywords, key=len, reverse=True)
+        self._keyword_scan = re.compile(f"(?=({_trie_regex(ordered)}))") if ordered else None
+        self._prefixes = {k: [p for p in ordered if k.startswith(p)] for k in ordered}
+
+    def route(self, task: Task) -> str | None:
+        """Return the agent name for a task, or None if no rule matches."""
+        text = f"{task.title}\n{task.description or ''}"
+        hits: set[str] = set()
+        if self._keyword_scan:
+            for m in self._keyword_scan.finditer(text.lower()):
+                hits.update(self._prefixes[m.group(1)])
+
+        paths: list[str] | None = None
+        for rule in self.rules:
+            if rule.task_type is not None and rule.task_type != task.type:
+                continue
+            if rule.min_priority is not None and task.priority < rule.min_priority:
+                continue
+            if rule.max_priority is not None and task.priority > rule.max_priority:
+                continue
+            if rule.keyword is not None and rule.keyword not in hits:
+                continue
+            if rule.regex is not None and not rule.regex.search(text):
+                continue
+            if rule.glob is not None:
+                if paths is None:
+                    paths = _PATH_TOKEN.findall(text)
+                if not any(rule.glob.match(p) for p in paths):
+                    continue
+            return rule.agent_name
+        return None
+
+
+_cache: dict[UUID, tuple[int, CompiledRouter]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_router(db: Session, redis: Redis, project_id: UUID) -> CompiledRouter:
+    """Return the project's compiled router, recompiling if its rules changed."""
+    version = int(redis.get(version_key(project_id)) or 0)
+    with _cache_lock:
+        cached = _cache.get(project_id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    rules = (
+        db.query(RoutingRule)
+        .filter(RoutingRule.project_id == project_id)
+        .filter(RoutingRule.is_enabled.is_(True))
+        .order_by(RoutingRule.position.asc(), RoutingRule.created_at.asc())
+        .all()
+    )
+    router = CompiledRouter(rules)
+    with _cache_lock:
+        _cache[project_id] = (version, router)
+    return router
+
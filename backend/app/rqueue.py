@@ -1,11 +1,28 @@
 import sys
-from redis import Redis
+from redis import ConnectionPool, Redis
+from redis.asyncio import Redis as AsyncRedis
 from rq import Queue, Worker
 from .settings import settings
 
 
+_pool: ConnectionPool | None = None
+_async_redis: AsyncRedis | None = None
+
+
 def get_redis() -> Redis:
-    return Redis.from_url(settings.REDIS_URL)
+    """Return a client backed by the process-wide connection pool."""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool.from_url(settings.REDIS_URL)
+    return Redis(connection_pool=_pool)
+
+
+def get_async_redis() -> AsyncRedis:
+    """Return the process-wide asyncio Redis client (shares one connection pool)."""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = AsyncRedis.from_url(settings.REDIS_URL)
+    return _async_redis
 
 
 def get_queue(name: str) -> Queue:
@@ -0,0 +1,295 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+from redis import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .models import AgentRun, Project, Task
+from .orchestrator import orchestrator_cycle
+from .settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "scheduler:stats"
+QUEUE_METRICS_KEY = "scheduler:queue_metrics"
+
+# Events that can make queued tasks schedulable
+WAKE_EVENTS = {"task.created", "task.updated", "agent.run.completed"}
+
+
+class FairShare:
+    """
+    Weighted fair sharing of scheduler cycles between projects (stride scheduling).
+
+    Every project carries a virtual pass that advances by runs scheduled
+    divided by its scheduling_weight; the busy project with the lowest pass
+    runs the next cycle. A project with weight 2 therefore gets about twice
+    the runs of a weight-1 project while both have work, and a project that
+    was idle rejoins at the current minimum instead of cashing in credit.
+    """
+
+    def __init__(self):
+        self.passes: dict[UUID, float] = {}
+        self.weights: dict[UUID, float] = {}
+
+    def activate(self, project_id: UUID, busy: set[UUID]) -> None:
+        floor = min((self.passes.get(p, 0.0) for p in busy), default=0.0)
+        self.passes[project_id] = max(self.passes.get(project_id, 0.0), floor)
+
+    def next(self, busy: set[UUID]) -> UUID:
+        return min(busy, key=lambda p: self.passes.get(p, 0.0))
+
+    def charge(self, project_id: UUID, scheduled: int) -> None:
+        weight = self.weights.get(project_id, 1.0) or 1.0
+        # Charge at least one unit so projects that only block tasks still rotate
+        self.passes[project_id] = self.passes.get(project_id, 0.0) + max(scheduled, 1) / weight
+
+
+def _join(fair: FairShare, busy: set[UUID], project_id: UUID) -> None:
+    if project_id not in busy:
+        fair.activate(project_id, busy)
+        busy.add(project_id)
+
+
+def run_fair_cycle(db: Session, redis: Redis, fair: FairShare, busy: set[UUID]) -> int:
+    """
+    Run one orchestrator cycle for the project whose turn it is.
+
+    The project leaves `busy` once a cycle sees fewer tasks than the batch
+    size, or when every task it saw was deferred because its agent is at
+    capacity.
+    """
+    batch_size = settings.SCHEDULER_BATCH_SIZE
+    project_id = fair.next(busy)
+    try:
+        result = orchestrator_cycle(db, redis, project_id, limit=batch_size)
+    except Exception:
+        busy.discard(project_id)
+        raise
+    scheduled = len(result["scheduled_runs"])
+    fair.charge(project_id, scheduled)
+
+    moved = result["tasks_processed"] - result["tasks_deferred"]
+    if result["tasks_processed"] < batch_size or moved == 0:
+        busy.discard(project_id)
+    return scheduled
+
+
+def projects_with_queued_tasks(db: Session) -> set[UUID]:
+    return {
+        project_id
+        for (project_id,) in (
+            db.query(Task.project_id)
+            .filter(Task.status == "queued")
+            .filter(Task.pending_deps == 0)
+            .distinct()
+            .all()
+        )
+    }
+
+
+def project_weights(db: Session) -> dict[UUID, float]:
+    return dict(db.query(Project.id, Project.scheduling_weight).all())
+
+
+def queue_metrics(db: Session) -> dict[str, Any]:
+    """
+    Queue depth and wait times per project.
+
+    queued/oldest_wait_seconds describe tasks still waiting; the wait_* fields
+    cover runs started in the last hour, measured from task creation.
+    """
+    projects: dict[str, dict[str, Any]] = {}
+
+    queued = (
+        db.query(
+            Task.project_id,
+            func.count(Task.id),
+            func.extract("epoch", func.now() - func.min(Task.created_at)),
+        )
+        .filter(Task.status == "queued")
+        .group_by(Task.project_id)
+        .all()
+    )
+    for project_id, depth, oldest in queued:
+        projects[str(project_id)] = {"queued": depth, "oldest_wait_seconds": float(oldest)}
+
+    wait = func.extract("epoch", AgentRun.started_at - Task.created_at)
+    waits = (
+        db.query(
+            AgentRun.project_id,
+            func.count(AgentRun.id),
+            func.avg(wait),
+            func.percentile_cont(0.95).within_group(wait),
+        )
+        .join(Task, Task.id == AgentRun.task_id)
+        .filter(AgentRun.started_at > func.now() - timedelta(hours=1))
+        .group_by(AgentRun.project_id)
+        .all()
+    )
+    for project_id, started, avg_wait, p95_wait in waits:
+        entry = projects.setdefault(str(project_id), {"queued": 0, "oldest_wait_seconds": None})
+        entry.update({
+            "runs_started_last_hour": started,
+            "wait_avg_seconds": float(avg_wait),
+            "wait_p95_seconds": float(p95_wait),
+        })
+
+    return {
+        "queued_total": sum(p["queued"] for p in projects.values()),
+        "projects": projects,
+    }
+
+
+def cached_queue_metrics(db: Session, redis: Redis) -> dict[str, Any]:
+    """
+    queue_metrics, computed at most once per METRICS_QUEUE_CACHE_SECONDS.
+
+    The wait percentiles aggregate an hour of runs; scrapers polling every
+    few seconds share one snapshot across all API processes.
+    """
+    raw = redis.get(QUEUE_METRICS_KEY)
+    if raw is not None:
+        return json.loads(raw)
+    result = queue_metrics(db)
+    result["computed_at"] = datetime.now(timezone.utc).isoformat()
+    redis.set(QUEUE_METRICS_KEY, json.dumps(result), ex=max(1, settings.METRICS_QUEUE_CACHE_SECONDS))
+    return result
+
+
+def scheduler_stats(redis: Redis) -> dict[str, Any]:
+    """Counters for measuring how fast the scheduler drains queues."""
+    raw = {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): (v.decode("utf-8") if isinstance(v, bytes) else v)
+        for k, v in redis.hgetall(STATS_KEY).items()
+    }
+    return {
+        "runs_scheduled": int(raw.get("runs_scheduled", 0)),
+        "drains": int(raw.get("drains", 0)),
+        "last_drain_at": raw.get("last_drain_at"),
+        "last_drain_ms": float(raw["last_drain_ms"]) if "last_drain_ms" in raw else None,
+        "last_drain_runs": int(raw.get("last_drain_runs", 0)),
+    }
+
+
+def _record_drain(redis: Redis, scheduled: int, elapsed_ms: float) -> None:
+    pipe = redis.pipeline()
+    pipe.hincrby(STATS_KEY, "runs_scheduled", scheduled)
+    pipe.hincrby(STATS_KEY, "drains", 1)
+    pipe.hset(STATS_KEY, mapping={
+        "last_drain_at": datetime.now(timezone.utc).isoformat(),
+        "last_drain_ms": f"{elapsed_ms:.1f}",
+        "last_drain_runs": scheduled,
+    })
+    pipe.execute()
+
+
+def _woken_project(message: dict) -> UUID | None:
+    """Return the project a realtime event wakes the scheduler for, if any."""
+    try:
+        event = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return None
+    if event.get("type") not in WAKE_EVENTS:
+        return None
+    if event["type"].startswith("task.") and event.get("payload", {}).get("status") != "queued":
+        return None
+    try:
+        return UUID(event["project_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def run_scheduler() -> None:
+    """
+    Schedule queued tasks continuously, sharing cycles fairly between projects.
+
+    Wakes on tasks created or moved into the queued state and on
+    agent.run.completed events, and sweeps every project with queued tasks
+    every SCHEDULER_TICK_SECONDS in case an event was missed. Cycles lock
+    their project, so it is safe to run next to the orchestrator workers.
+    """
+    from .db import SessionLocal
+    from .rqueue import get_redis
+
+    redis = get_redis()
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.psubscribe("project:*")
+
+    dirty: set[UUID] = set()
+    busy: set[UUID] = set()
+    fair = FairShare()
+    next_tick = 0.0
+
+    while True:
+        if time.monotonic() >= next_tick:
+            db = SessionLocal()
+            try:
+                dirty |= projects_with_queued_tasks(db)
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            finally:
+                db.close()
+            next_tick = time.monotonic() + settings.SCHEDULER_TICK_SECONDS
+
+        # Block for the first event, then collect whatever else is already waiting
+        timeout = 0.0 if dirty or busy else max(0.0, next_tick - time.monotonic())
+        try:
+            message = pubsub.get_message(timeout=timeout)
+            while message:
+                project_id = _woken_project(message)
+                if project_id:
+                    dirty.add(project_id)
+                message = pubsub.get_message(timeout=0.0)
+        except RedisError:
+            logger.exception("Lost event subscription; resubscribing")
+            time.sleep(1.0)
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe("project:*")
+            # Events may have been missed while disconnected
+            next_tick = 0.0
+            continue
+
+        if not dirty and not busy:
+            continue
+
+        db = SessionLocal()
+        started = time.monotonic()
+        scheduled = 0
+        try:
+            fair.weights = project_weights(db)
+            for project_id in dirty:
+                _join(fair, busy, project_id)
+            dirty.clear()
+
+            # Interleave cycles across busy projects; projects woken meanwhile
+            # join the rotation without waiting for this round to finish
+            while busy:
+                scheduled += run_fair_cycle(db, redis, fair, busy)
+                for message in iter(lambda: pubsub.get_message(timeout=0.0), None):
+                    project_id = _woken_project(message)
+                    if project_id:
+                        _join(fair, busy, project_id)
+            _record_drain(redis, scheduled, (time.monotonic() - started) * 1000)
+            if scheduled:
+                logger.info("Scheduled %d runs", scheduled)
+        except Exception:
+            logger.exception("Scheduling failed")
+            db.rollback()
+            # The next tick retries anything still queued
+        finally:
+            db.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    run_scheduler()
+
+
+if __name__ == "__main__":
+    main()
@@ -28,12 +28,14 @@ class ProjectCreate(BaseModel):
     name: str
     description: str | None = None
     default_repo_path: str | None = None
+    scheduling_weight: float = Field(default=1.0, gt=0)
 
 
 class ProjectPatch(BaseModel):
     name: str | None = None
     description: str | None = None
     default_repo_path: str | None = None
+    scheduling_weight: float | None = Field(default=None, gt=0)
 
 
 class ProjectOut(BaseModel):
@@ -41,6 +43,7 @@ class ProjectOut(BaseModel):
     name: str
     description: str | None
     default_repo_path: str | None
+    scheduling_weight: float = 1.0
     created_at: datetime
     updated_at: datetime
 
@@ -83,6 +86,47 @@ class AgentOut(BaseModel):
     created_at: datetime
 
 
+# Routing rule schemas
+class RoutingRuleCreate(BaseModel):
+    agent_name: str
+    position: int = 100
+    task_type: str | None = None
+    pattern: str | None = None
+    pattern_is_regex: bool = False
+    path_glob: str | None = None
+    min_priority: int | None = None
+    max_priority: int | None = None
+    is_enabled: bool = True
+
+
+class RoutingRulePatch(BaseModel):
+    agent_name: str | None = None
+    position: int | None = None
+    task_type: str | None = None
+    pattern: str | None = None
+    pattern_is_regex: bool | None = None
+    path_glob: str | None = None
+    min_priority: int | None = None
+    max_priority: int | None = None
+    is_enabled: bool | None = None
+
+
+class RoutingRuleOut(BaseModel):
+    id: UUID
+    project_id: UUID
+    agent_name: str
+    position: int
+    task_type: str | None
+    pattern: str | None
+    pattern_is_regex: bool
+    path_glob: str | None
+    min_priority: int | None
+    max_priority: int | None
+    is_enabled: bool
+    created_at: datetime
+    updated_at: datetime
+
+
 # Task schemas
 class TaskCreate(BaseModel):
     title: str
@@ -90,6 +134,7 @@ class TaskCreate(BaseModel):
     type: str = "code_change"
     priority: int = 3
     requested_by: str = "chat"
+    depends_on: list[UUID] = Field(default_factory=list)
 
 
 class TaskOut(BaseModel):
@@ -100,6 +145,7 @@ class TaskOut(BaseModel):
     type: str
     priority: int
     status: str
+    pending_deps: int = 0
     requested_by: str
     created_at: datetime
     updated_at: datetime
@@ -113,6 +159,10 @@ class TaskPatch(BaseModel):
     status: str | None = None
 
 
+class TaskDependencyCreate(BaseModel):
+    depends_on_task_id: UUID
+
+
 class TaskEventCreate(BaseModel):
     event_type: str
     payload: dict[str, Any] = Field(default_factory=dict)
@@ -138,6 +188,8 @@ class AgentRunOut(BaseModel):
     exit_code: int | None
     summary: str | None
     metrics: dict[str, Any] | None
+    claimed_by: str | None = None
+    lease_expires_at: datetime | None = None
 
 
 class RunLogCreate(BaseModel):
@@ -155,10 +207,45 @@ class RunLogOut(BaseModel):
     created_at: datetime
 
 
+class RunLogBatchOut(BaseModel):
+    run_id: UUID
+    received: int
+    inserted: int
+    last_seq: int | None
+
+
 class RunCompleteRequest(BaseModel):
     status: str
     exit_code: int
     summary: str
+    runner_id: str | None = None
+
+
+class RunClaimRequest(BaseModel):
+    runner_id: str = Field(min_length=1)
+    wait: float = Field(default=25, ge=0)
+
+
+class RunnerClaimRequest(RunClaimRequest):
+    project_ids: list[UUID] | None = None
+    repo_roots: list[str] | None = None
+
+
+class RunHeartbeatRequest(BaseModel):
+    runner_id: str = Field(min_length=1)
+
+
+class RunLeaseOut(BaseModel):
+    run_id: UUID
+    claimed_by: str
+    lease_expires_at: datetime
+
+
+class RunDispatchOut(BaseModel):
+    run: AgentRunOut
+    task: TaskOut | None
+    project: ProjectOut
+    agent: AgentOut | None
 
 
 # Conversation schemas
@@ -199,12 +286,40 @@ class RecordingOut(BaseModel):
     conversation_id: UUID
     storage_path: str
     mime_type: str
+    content_hash: str | None
+    normalized_path: str | None
+    playback_path: str | None
     duration_ms: int | None
     transcript_text: str | None
     transcript_json: dict[str, Any] | None
     created_at: datetime
 
 
+class UploadCreate(BaseModel):
+    length: int = Field(gt=0)
+    mime_type: str = "audio/webm"
+
+
+class UploadOut(BaseModel):
+    upload_id: UUID
+    offset: int
+    length: int
+    # Set once the last byte arrived and the recording was created
+    recording: RecordingOut | None = None
+
+
+# Artifact schemas
+class ArtifactOut(BaseModel):
+    id: UUID
+    project_id: UUID
+    task_id: UUID | None
+    run_id: UUID | None
+    kind: str
+    storage_path: str
+    meta: dict[str, Any]
+    created_at: datetime
+
+
 # Orchestrator schemas
 class OrchestratorRunRequest(BaseModel):
     mode: str = "incremental"
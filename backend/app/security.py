@@ -3,9 +3,11 @@ import hashlib
 import os
 import bcrypt
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .settings import settings
 from .models import User, Session as DbSession
+from . import session_cache
 
 
 def hash_password(password: str) -> str:
@@ -29,32 +31,51 @@ def _hash_token(token: str) -> str:
     return h.hexdigest()
 
 
-def create_session(db: Session, user: User) -> tuple[str, datetime]:
+async def create_session(db: AsyncSession, user: User) -> tuple[str, datetime]:
     token = _random_token()
     token_hash = _hash_token(token)
     expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.SESSION_TTL_SECONDS)
     s = DbSession(user_id=user.id, token_hash=token_hash, expires_at=expires_at)
     db.add(s)
-    db.commit()
+    await db.commit()
     return token, expires_at
 
 
-def get_user_by_session_token(db: Session, token: str) -> User | None:
+async def get_user_by_session_token(db: AsyncSession, token: str) -> User | None:
+    """
+    Resolve a session token to its user.
+
+    Hits are served from the session cache without touching the database;
+    expiry is still enforced from the cached expires_at. A cache hit returns
+    a transient User carrying only the fields in CachedSession (no
+    password_hash, no relationships); load the user from `db` when more is
+    needed.
+    """
     token_hash = _hash_token(token)
-    s = db.query(DbSession).filter(DbSession.token_hash == token_hash).first()
+    now = datetime.now(timezone.utc)
+
+    cached = await session_cache.lookup(token_hash)
+    if cached is not None:
+        if cached.expires_at > now:
+            return cached.to_user()
+        await session_cache.invalidate_token(token_hash)
+
+    s = await db.scalar(select(DbSession).where(DbSession.token_hash == token_hash))
     if not s:
         return None
-    now = datetime.now(timezone.utc)
     if s.expires_at <= now:
-        db.delete(s)
-        db.commit()
+        await db.delete(s)
+        await db.commit()
         return None
-    return db.query(User).filter(User.id == s.user_id).first()
+    user = await db.get(User, s.user_id)
+    if user:
+        await session_cache.store(token_hash, session_cache.CachedSession.from_user(user, s.expires_at))
+    return user
 
 
-def revoke_session(db: Session, token: str) -> None:
+async def revoke_session(db: AsyncSession, token: str) -> None:
     token_hash = _hash_token(token)
-    s = db.query(DbSession).filter(DbSession.token_hash == token_hash).first()
-    if s:
-        db.delete(s)
-        db.commit()
+    await db.execute(delete(DbSession).where(DbSession.token_hash == token_hash))
+    await db.commit()
+    await session_cache.invalidate_token(token_hash)
+
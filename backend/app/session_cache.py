@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+from uuid import UUID
+from .models import User
+from .rqueue import get_async_redis
+from .settings import settings
+
+if TYPE_CHECKING:
+    from .ws import RealtimeHub
+
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "sessions:invalidate"
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    """The parts of a session and its user needed to authenticate a request."""
+    user_id: UUID
+    email: str
+    is_admin: bool
+    is_active: bool
+    user_created_at: datetime
+    expires_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User, expires_at: datetime) -> "CachedSession":
+        return cls(
+            user_id=user.id,
+            email=user.email,
+            is_admin=user.is_admin,
+            is_active=user.is_active,
+            user_created_at=user.created_at,
+            expires_at=expires_at,
+        )
+
+    def to_user(self) -> User:
+        """
+        Build a transient User carrying the cached fields.
+
+        It is not attached to a session: password_hash is unset and
+        relationships can't be loaded, so handlers needing either must
+        fetch the user by id.
+        """
+        return User(
+            id=self.user_id,
+            email=self.email,
+            is_admin=self.is_admin,
+            is_active=self.is_active,
+            created_at=self.user_created_at,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "user_id": str(self.user_id),
+            "email": self.email,
+            "is_admin": self.is_admin,
+            "is_active": self.is_active,
+            "user_created_at": self.user_created_at.isoformat(),
+            "expires_at": self.expires_at.isoformat(),
+        })
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "CachedSession":
+        d = json.loads(raw)
+        return cls(
+            user_id=UUID(d["user_id"]),
+            email=d["email"],
+            is_admin=d["is_admin"],
+            is_active=d["is_active"],
+            user_created_at=datetime.fromisoformat(d["user_created_at"]),
+            expires_at=datetime.fromisoformat(d["expires_at"]),
+        )
+
+
+class SessionCache:
+    """
+    Thread-safe TTL/LRU cache of session token hash -> CachedSession.
+
+    Entries live for at most ttl_seconds. Logout drops its token
+    everywhere; any other change to a user (is_active, is_admin, password)
+    reaches their cached sessions only once those entries expire, within
+    ttl_seconds. Session expiry itself is always checked against the
+    cached expires_at by the caller.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedSession]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash: str) -> CachedSession | None:
+        with self._lock:
+            item = self._entries.get(token_hash)
+            if item is None:
+                return None
+            stored_at, entry = item
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return entry
+
+    def put(self, token_hash: str, entry: CachedSession) -> None:
+        with self._lock:
+            self._entries[token_hash] = (time.monotonic(), entry)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token_hash: str) -> None:
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+session_cache = SessionCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+)
+
+
+def _token_key(token_hash: str) -> str:
+    return f"session:{token_hash}"
+
+
+async def lookup(token_hash: str) -> CachedSession | None:
+    """Look up a session in the local cache, then in the shared Redis tier."""
+    if not settings.SESSION_CACHE_ENABLED:
+        return None
+
+    entry = session_cache.get(token_hash)
+    if entry is not None or not settings.SESSION_CACHE_REDIS:
+        return entry
+
+    raw = await get_async_redis().get(_token_key(token_hash))
+    if raw is None:
+        return None
+    entry = CachedSession.from_json(raw)
+    session_cache.put(token_hash, entry)
+    return entry
+
+
+async def store(token_hash: str, entry: CachedSession) -> None:
+    if not settings.SESSION_CACHE_ENABLED:
+        return
+
+    session_cache.put(token_hash, entry)
+    if settings.SESSION_CACHE_REDIS:
+        remaining = (entry.expires_at - datetime.now(timezone.utc)).total_seconds()
+        ttl = int(min(settings.SESSION_CACHE_TTL_SECONDS, remaining))
+        if ttl > 0:
+            await get_async_redis().set(_token_key(token_hash), entry.to_json(), ex=ttl)
+
+
+async def invalidate_token(token_hash: str) -> None:
+    """Drop a session everywhere and tell the other API processes to do the same."""
+    session_cache.invalidate_token(token_hash)
+    if not settings.SESSION_CACHE_ENABLED:
+        return
+
+    async with get_async_redis().pipeline() as pipe:
+        if settings.SESSION_CACHE_REDIS:
+            pipe.delete(_token_key(token_hash))
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps({"token_hash": token_hash}))
+        await pipe.execute()
+
+
+async def run_invalidation_listener(hub: "RealtimeHub") -> None:
+    """Apply invalidations published by other processes to the local cache."""
+    queue = await hub.subscribe(INVALIDATION_CHANNEL)
+    try:
+        while True:
+            data = await queue.get()
+            if data is None:
+                # Messages were dropped; start over from an empty cache
+                session_cache.clear()
+                queue = await hub.subscribe(INVALIDATION_CHANNEL)
+                continue
+            try:
+                msg = json.loads(data)
+            except ValueError:
+                continue
+            if msg.get("token_hash"):
+                session_cache.invalidate_token(msg["token_hash"])
+    except asyncio.CancelledError:
+        await hub.unsubscribe(INVALIDATION_CHANNEL, queue)
+        raise
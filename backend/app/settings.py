@@ -6,6 +6,10 @@ class Settings(BaseSettings):
     APP_NAME: str = "OvermindOps"
 
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: int = 30
     REDIS_URL: str
 
     SECRET_KEY_CHANGE_ME: str
@@ -13,13 +17,103 @@ class Settings(BaseSettings):
     SESSION_TTL_SECONDS: int = 86400
     PASSWORD_BCRYPT_ROUNDS: int = 12
 
+    SESSION_CACHE_ENABLED: bool = True
+    # Sessions are only revoked on logout; any other change to a user (deactivation,
+    # role or password) reaches their cached sessions within this many seconds
+    SESSION_CACHE_TTL_SECONDS: int = 60
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    # Share cached sessions across API processes through Redis
+    SESSION_CACHE_REDIS: bool = False
+
     DATA_DIR: str = "/data"
     RECORDINGS_DIR: str = "/data/recordings"
     ARTIFACTS_DIR: str = "/data/artifacts"
+    UPLOADS_DIR: str = "/data/uploads"
+
+    # Content-addressed blob storage: "local" (sharded under BLOB_DIR) or "s3"
+    BLOB_BACKEND: str = "local"
+    BLOB_DIR: str = "/data/blobs"
+    # Unreferenced blobs are deleted after this long, every BLOB_GC_INTERVAL_SECONDS
+    BLOB_GC_GRACE_SECONDS: int = 3600
+    BLOB_GC_INTERVAL_SECONDS: int = 600
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = "blobs/"
+    S3_ENDPOINT_URL: str = ""
+    S3_REGION: str = ""
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_PRESIGN_SECONDS: int = 3600
+
+    # Recording uploads are streamed to disk in chunks of this size
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    RECORDING_MAX_BYTES: int = 512 * 1024 * 1024
+    # Resumable uploads expire after this long without receiving data
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400
+    UPLOAD_LOCK_SECONDS: int = 60
+
+    # Opus bitrate of the compact playback copy made after upload
+    MEDIA_PLAYBACK_BITRATE: str = "24k"
+    MEDIA_FFMPEG_TIMEOUT_SECONDS: int = 1800
+
+    DOWNLOAD_CHUNK_BYTES: int = 256 * 1024
+    # When set (e.g. "/protected"), downloads are handed to nginx with
+    # X-Accel-Redirect to <prefix>/<path under DATA_DIR>
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX: str = ""
 
     WHISPER_MODEL_SIZE: str = "small"
     WHISPER_DEVICE: str = "cpu"
     WHISPER_COMPUTE_TYPE: str = "int8"
+    # CTranslate2 threads per model replica (0 = library default) and replicas
+    # that can decode concurrently inside one transcription service
+    WHISPER_CPU_THREADS: int = 0
+    WHISPER_NUM_WORKERS: int = 2
+    # Audio windows decoded together by the batched pipeline
+    WHISPER_BATCH_SIZE: int = 8
+    # Recordings the transcription service works on at once
+    TRANSCRIPTION_CONCURRENCY: int = 2
+    TRANSCRIPTION_DEQUEUE_TIMEOUT_SECONDS: int = 5
+    # Longer recordings are cut at pauses and their chunks transcribed in parallel
+    TRANSCRIPTION_CHUNK_MIN_SECONDS: float = 600.0
+    TRANSCRIPTION_CHUNK_SECONDS: float = 300.0
+
+    # Live transcription: a pause this long closes a speech segment for decoding
+    STREAM_VAD_ENERGY_THRESHOLD: float = 0.01
+    STREAM_VAD_SILENCE_MS: int = 400
+    STREAM_VAD_PREROLL_MS: int = 150
+    STREAM_VAD_MAX_SEGMENT_SECONDS: float = 15.0
+    # Load Whisper when the API starts rather than on the first live segment,
+    # and the threads per API process that decode live segments
+    STREAM_PRELOAD_MODEL: bool = False
+    STREAM_DECODE_THREADS: int = 1
+
+    RUN_LOG_BATCH_MAX_ENTRIES: int = 1000
+    RUNNER_DISPATCH_MAX_WAIT_SECONDS: int = 30
+
+    # Continuous scheduler: tasks per orchestrator cycle and safety sweep interval
+    SCHEDULER_BATCH_SIZE: int = 100
+    SCHEDULER_TICK_SECONDS: float = 30.0
+    # Queued tasks gain one priority level per this many seconds of waiting
+    SCHEDULER_AGING_SECONDS: int = 600
+    # /metrics requires "Authorization: Bearer <METRICS_TOKEN>" and is
+    # disabled while unset; queue wait statistics are recomputed this often
+    METRICS_TOKEN: str = ""
+    METRICS_QUEUE_CACHE_SECONDS: int = 30
+    # Runners must heartbeat within this window or their run is requeued
+    RUN_LEASE_SECONDS: int = 60
+    RUN_LEASE_REAP_INTERVAL_SECONDS: int = 15
+
+    # Write-behind event journal: publish immediately, persist in batches
+    EVENT_JOURNAL_ENABLED: bool = False
+    EVENT_JOURNAL_STREAM: str = "events:journal"
+    EVENT_JOURNAL_BATCH_SIZE: int = 500
+    EVENT_JOURNAL_BLOCK_MS: int = 1000
+    # Upper bound on how long a direct-mode emit may hold its project's ordering lock
+    EVENT_SEQ_LOCK_SECONDS: float = 10.0
+
+    # Per-socket buffer of pending realtime messages before a slow client is dropped
+    WS_QUEUE_MAXSIZE: int = 1000
+    # Reconnects further behind than this get replay.truncated and must reload
+    WS_REPLAY_MAX_EVENTS: int = 5000
 
     class Config:
         env_file = ".env"
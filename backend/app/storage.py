@@ -1,11 +1,38 @@
+import asyncio
+import hashlib
 import os
+import re
+import logging
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
 from uuid import UUID
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .db import SessionLocal
+from .models import Blob
 from .settings import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# Storage refs in storage_path columns are either a blob key (sha256 hex)
+# or, for files written before the blob store, an absolute local path
+_BLOB_KEY = re.compile(r"[0-9a-f]{64}")
+
+
 def ensure_dirs() -> None:
     os.makedirs(settings.RECORDINGS_DIR, exist_ok=True)
     os.makedirs(settings.ARTIFACTS_DIR, exist_ok=True)
+    os.makedirs(settings.UPLOADS_DIR, exist_ok=True)
+    if settings.BLOB_BACKEND == "local":
+        os.makedirs(settings.BLOB_DIR, exist_ok=True)
 
 
 def recording_path(recording_id: UUID, ext: str) -> str:
@@ -14,3 +41,263 @@ def recording_path(recording_id: UUID, ext: str) -> str:
 
 def artifact_path(artifact_id: UUID, ext: str) -> str:
     return os.path.join(settings.ARTIFACTS_DIR, f"{artifact_id}.{ext}")
+
+
+def staging_path(name: str) -> str:
+    """Scratch file on local disk for data on its way into the blob store."""
+    return os.path.join(settings.UPLOADS_DIR, name)
+
+
+def is_blob_key(ref: str | None) -> bool:
+    return bool(ref) and _BLOB_KEY.fullmatch(ref) is not None
+
+
+def hash_file(path: str) -> str:
+    """sha256 of a file, read in UPLOAD_CHUNK_BYTES pieces."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_BYTES):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for recordings and artifacts.
+
+    Blobs are immutable and named by the sha256 of their bytes, so storing
+    the same content twice keeps one copy. Which rows use a blob is tracked
+    in the blobs table; see ingest_file and collect_garbage.
+    """
+
+    @abstractmethod
+    def put(self, src: str, key: str) -> None:
+        """Move a local file into the store under `key`, consuming `src`."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a blob; deleting a missing key is not an error."""
+
+    def local_path(self, ref: str) -> str | None:
+        """Path of the stored bytes on this machine, if they live on local disk."""
+        return None if is_blob_key(ref) else ref
+
+    def url(self, key: str) -> str | None:
+        """Time-limited URL clients can download the blob from directly, if any."""
+        return None
+
+    @contextmanager
+    def open_local(self, ref: str) -> Iterator[str]:
+        """Yield a local path holding the bytes of `ref` for tools that need a file."""
+        path = self.local_path(ref)
+        if path is None:
+            raise FileNotFoundError(ref)
+        yield path
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs under BLOB_DIR, sharded as ab/cd/abcd... to keep directories small."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, src: str, key: str) -> None:
+        dst = self._path(key)
+        if os.path.exists(dst):
+            os.remove(src)
+            return
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        try:
+            os.replace(src, dst)
+        except OSError:
+            # Different filesystem: copy next to the target, then rename
+            tmp = f"{dst}.{os.getpid()}.tmp"
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+            os.remove(src)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, ref: str) -> str | None:
+        return self._path(ref) if is_blob_key(ref) else ref
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs in an S3-compatible bucket (AWS, MinIO, ...).
+
+    Requires boto3 (the `s3` extra). Downloads are served from presigned
+    URLs; local tools get a temporary copy.
+    """
+
+    def __init__(self):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("BLOB_BACKEND=s3 requires boto3; install the 's3' extra") from e
+
+        self.bucket = settings.S3_BUCKET
+        self.prefix = settings.S3_PREFIX
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key[:2]}/{key}"
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, src: str, key: str) -> None:
+        if not self._exists(key):
+            self.client.upload_file(src, self.bucket, self._key(key))
+        os.remove(src)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key: str) -> str | None:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=settings.S3_PRESIGN_SECONDS,
+        )
+
+    @contextmanager
+    def open_local(self, ref: str) -> Iterator[str]:
+        if not is_blob_key(ref):
+            yield ref
+            return
+        fd, tmp = tempfile.mkstemp(dir=settings.UPLOADS_DIR)
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(ref), tmp)
+            yield tmp
+        finally:
+            os.remove(tmp)
+
+
+_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store selected by BLOB_BACKEND."""
+    global _store
+    if _store is None:
+        if settings.BLOB_BACKEND == "s3":
+            _store = S3BlobStore()
+        elif settings.BLOB_BACKEND == "local":
+            _store = LocalBlobStore(settings.BLOB_DIR)
+        else:
+            raise RuntimeError(f"Unknown BLOB_BACKEND {settings.BLOB_BACKEND!r}")
+    return _store
+
+
+def _register_stmt(key: str, size: int):
+    # Touching updated_at keeps the garbage collector off this blob while
+    # the row that will reference it is being written
+    return (
+        pg_insert(Blob)
+        .values(sha256=key, size=size)
+        .on_conflict_do_update(index_elements=[Blob.sha256], set_={"updated_at": func.now()})
+    )
+
+
+def ingest_file(db: Session, path: str, key: str | None = None) -> str:
+    """
+    Move a local file into the blob store and return its key.
+
+    Pass `key` when the sha256 was already computed while writing the file.
+
+    The blob is registered (and committed) before its bytes are stored so a
+    concurrent garbage collection can't delete a copy we are about to
+    reuse. References are counted by database triggers once a recording or
+    artifact row points at the key.
+    """
+    key = key or hash_file(path)
+    db.execute(_register_stmt(key, os.path.getsize(path)))
+    db.commit()
+    get_blob_store().put(path, key)
+    return key
+
+
+async def ingest_file_async(db: AsyncSession, path: str, key: str | None = None) -> str:
+    """Async counterpart of ingest_file; file work runs in a thread."""
+    key = key or await asyncio.to_thread(hash_file, path)
+    await db.execute(_register_stmt(key, os.path.getsize(path)))
+    await db.commit()
+    await asyncio.to_thread(get_blob_store().put, path, key)
+    return key
+
+
+def discard_legacy(ref: str | None) -> None:
+    """Delete a pre-blob-store file; blob refs are reclaimed by collect_garbage."""
+    if ref and not is_blob_key(ref):
+        try:
+            os.remove(ref)
+        except OSError:
+            pass
+
+
+def collect_garbage(db: Session) -> int:
+    """
+    Delete blobs nothing has referenced for BLOB_GC_GRACE_SECONDS.
+
+    Rows are locked while their bytes are removed, so a concurrent
+    ingest_file waits and then re-creates the row (and the bytes).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS)
+    store = get_blob_store()
+    collected = 0
+    while True:
+        blobs = db.scalars(
+            select(Blob)
+            .where(Blob.refcount <= 0, Blob.updated_at < cutoff)
+            .limit(100)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not blobs:
+            db.rollback()
+            return collected
+        for blob in blobs:
+            store.delete(blob.sha256)
+            db.delete(blob)
+        db.commit()
+        collected += len(blobs)
+
+
+async def run_blob_gc() -> None:
+    """Periodically delete blobs that nothing references any more."""
+    def collect() -> int:
+        with SessionLocal() as db:
+            return collect_garbage(db)
+
+    while True:
+        await asyncio.sleep(settings.BLOB_GC_INTERVAL_SECONDS)
+        try:
+            collected = await asyncio.to_thread(collect)
+            if collected:
+                logger.info("Deleted %d unreferenced blobs", collected)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Blob garbage collection failed")
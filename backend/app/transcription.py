@@ -1,34 +1,150 @@
 from sqlalchemy.orm import Session
 from redis import Redis
-from faster_whisper import WhisperModel
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from uuid import UUID
-from .models import Recording, Message, Conversation
+from .models import Recording, Message, Conversation, TranscriptionCache
 from .events import emit_event
+from .media import load_normalized
+from .storage import get_blob_store
 from .settings import settings
 
 
 _model = None
+_pipeline = None
+_model_lock = threading.Lock()
 
 
-def _get_model() -> WhisperModel:
-    """Lazy-load the Whisper model to avoid loading it on import."""
+def get_model() -> WhisperModel:
+    """
+    The process-wide Whisper model, loaded on first use.
+
+    Processes that need it warm call this at startup (see
+    app.transcription_service and STREAM_PRELOAD_MODEL).
+    """
     global _model
-    if _model is None:
-        _model = WhisperModel(
-            settings.WHISPER_MODEL_SIZE,
-            device=settings.WHISPER_DEVICE,
-            compute_type=settings.WHISPER_COMPUTE_TYPE,
-        )
+    with _model_lock:
+        if _model is None:
+            _model = WhisperModel(
+                settings.WHISPER_MODEL_SIZE,
+                device=settings.WHISPER_DEVICE,
+                compute_type=settings.WHISPER_COMPUTE_TYPE,
+                cpu_threads=settings.WHISPER_CPU_THREADS,
+                num_workers=settings.WHISPER_NUM_WORKERS,
+            )
     return _model
 
 
+def get_pipeline() -> BatchedInferencePipeline:
+    """
+    Batched inference over the shared model.
+
+    VAD splits the audio into windows that are decoded WHISPER_BATCH_SIZE at
+    a time; up to WHISPER_NUM_WORKERS transcriptions can run concurrently on
+    the same weights.
+    """
+    global _pipeline
+    model = get_model()
+    with _model_lock:
+        if _pipeline is None:
+            _pipeline = BatchedInferencePipeline(model=model)
+    return _pipeline
+
+
+SAMPLE_RATE = 16000
+
+
+def split_at_silence(speech: list[dict[str, int]], total: int, target: int) -> list[tuple[int, int]]:
+    """
+    Cut [0, total) samples into chunks of roughly `target` samples.
+
+    Cuts fall in the middle of the pauses between speech regions, so no
+    chunk boundary splits a word. A single stretch of speech longer than
+    1.5x target is cut hard rather than left as one oversized chunk.
+    """
+    bounds = [0]
+    for prev, nxt in zip(speech, speech[1:]):
+        if prev["end"] - bounds[-1] >= target:
+            bounds.append((prev["end"] + nxt["start"]) // 2)
+    bounds.append(total)
+
+    chunks = []
+    limit = int(target * 1.5)
+    for start, end in zip(bounds, bounds[1:]):
+        while end - start > limit:
+            chunks.append((start, start + target))
+            start += target
+        if end > start:
+            chunks.append((start, end))
+    return chunks
+
+
+def _transcribe_audio(audio: np.ndarray | str, offset: float = 0.0) -> tuple[str, float, list[dict[str, Any]]]:
+    segments, info = get_pipeline().transcribe(
+        audio,
+        batch_size=settings.WHISPER_BATCH_SIZE,
+        vad_filter=True,
+    )
+    segs = [
+        {
+            "start": round(offset + float(s.start), 3),
+            "end": round(offset + float(s.end), 3),
+            "text": s.text
+        }
+        for s in segments
+    ]
+    return info.language, info.duration, segs
+
+
+def transcribe_file(path: str) -> tuple[str, float, list[dict[str, Any]]]:
+    """
+    Transcribe an audio file, returning (language, duration, segments).
+
+    Recordings longer than TRANSCRIPTION_CHUNK_MIN_SECONDS are cut at VAD
+    pauses into chunks of about TRANSCRIPTION_CHUNK_SECONDS, transcribed
+    concurrently on the shared model (one chunk per WHISPER_NUM_WORKERS
+    replica) and merged back with their time offsets.
+    """
+    audio = load_normalized(path)
+    if audio is None:
+        audio = decode_audio(path, sampling_rate=SAMPLE_RATE)
+    duration = audio.shape[0] / SAMPLE_RATE
+    workers = settings.WHISPER_NUM_WORKERS
+    if duration < settings.TRANSCRIPTION_CHUNK_MIN_SECONDS or workers < 2:
+        return _transcribe_audio(audio)
+
+    speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+    chunks = split_at_silence(speech, audio.shape[0], int(settings.TRANSCRIPTION_CHUNK_SECONDS * SAMPLE_RATE))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcribe-chunk") as pool:
+        results = list(pool.map(
+            lambda chunk: _transcribe_audio(audio[chunk[0]:chunk[1]], chunk[0] / SAMPLE_RATE),
+            chunks
+        ))
+
+    segs = [s for _, _, chunk_segs in results for s in chunk_segs]
+    # Weigh each chunk's language guess by how much it said
+    votes = Counter()
+    for language, _, chunk_segs in results:
+        votes[language] += sum(len(s["text"]) for s in chunk_segs)
+    language = votes.most_common(1)[0][0] if votes else None
+    return language, duration, segs
+
+
 def transcribe_recording(db: Session, redis: Redis, recording_id: UUID) -> dict:
     """
     Transcribe a recording using faster-whisper.
 
     Process:
     1. Load recording from DB
-    2. Transcribe audio file
+    2. Reuse a cached transcript of identical audio, or transcribe the file
+       and cache the result
     3. Store transcript in recording
     4. Create message in conversation with transcript
     5. Emit realtime event
@@ -40,49 +156,30 @@ def transcribe_recording(db: Session, redis: Redis, recording_id: UUID) -> dict:
     if not rec:
         return {"ok": False, "error": "recording not found"}
 
+    if apply_cached_transcript(db, redis, rec):
+        return {"ok": True, "transcript_len": len(rec.transcript_text), "cached": True}
+
     try:
-        model = _get_model()
-        segments, info = model.transcribe(rec.storage_path, vad_filter=True)
-
-        text_parts = []
-        segs = []
-        for s in segments:
-            text_parts.append(s.text)
-            segs.append({
-                "start": float(s.start),
-                "end": float(s.end),
-                "text": s.text
-            })
-
-        transcript = " ".join([t.strip() for t in text_parts if t.strip()]).strip()
-
-        # Update recording with transcript
-        rec.transcript_text = transcript
-        rec.transcript_json = {
-            "language": info.language,
+        with get_blob_store().open_local(rec.normalized_path or rec.storage_path) as path:
+            language, duration, segs = transcribe_file(path)
+
+        transcript = " ".join([s["text"].strip() for s in segs if s["text"].strip()]).strip()
+        transcript_json = {
+            "language": language,
             "segments": segs,
-            "duration": info.duration
+            "duration": duration
         }
-        db.commit()
-
-        # Create message in conversation with transcript content
-        conv = db.query(Conversation).filter(Conversation.id == rec.conversation_id).first()
-        if conv and transcript:
-            msg = Message(
-                conversation_id=conv.id,
-                role="user",
-                content=transcript,
-                content_format="plain"
+        if rec.content_hash:
+            db.execute(
+                pg_insert(TranscriptionCache)
+                .values(
+                    **_cache_key(rec.content_hash),
+                    transcript_text=transcript,
+                    transcript_json=transcript_json
+                )
+                .on_conflict_do_nothing()
             )
-            db.add(msg)
-            db.commit()
-            db.refresh(msg)
-
-            emit_event(db, redis, conv.project_id, "conversation.message.created", {
-                "message_id": str(msg.id),
-                "conversation_id": str(conv.id),
-                "from_recording": str(recording_id)
-            })
+        store_transcript(db, redis, rec, transcript, transcript_json)
 
         return {"ok": True, "transcript_len": len(transcript)}
 
@@ -90,6 +187,57 @@ def transcribe_recording(db: Session, redis: Redis, recording_id: UUID) -> dict:
         return {"ok": False, "error": str(e)}
 
 
+def _cache_key(content_hash: str) -> dict[str, str]:
+    # A transcript is only reusable for the model settings that produced it
+    return {
+        "content_hash": content_hash,
+        "model_size": settings.WHISPER_MODEL_SIZE,
+        "compute_type": settings.WHISPER_COMPUTE_TYPE,
+    }
+
+
+def apply_cached_transcript(db: Session, redis: Redis, rec: Recording) -> bool:
+    """
+    Fill in a recording's transcript from the cache of identical audio.
+
+    Returns False when the recording has no content hash or nothing was
+    cached for it under the current model settings.
+    """
+    if not rec.content_hash:
+        return False
+    cached = db.get(TranscriptionCache, tuple(_cache_key(rec.content_hash).values()))
+    if not cached:
+        return False
+    store_transcript(db, redis, rec, cached.transcript_text, cached.transcript_json)
+    return True
+
+
+def store_transcript(db: Session, redis: Redis, rec: Recording, transcript: str, transcript_json: dict) -> None:
+    """Save a transcript on its recording and post it to the conversation."""
+    rec.transcript_text = transcript
+    rec.transcript_json = transcript_json
+    db.commit()
+
+    # Create message in conversation with transcript content
+    conv = db.query(Conversation).filter(Conversation.id == rec.conversation_id).first()
+    if conv and transcript:
+        msg = Message(
+            conversation_id=conv.id,
+            role="user",
+            content=transcript,
+            content_format="plain"
+        )
+        db.add(msg)
+        db.commit()
+        db.refresh(msg)
+
+        emit_event(db, redis, conv.project_id, "conversation.message.created", {
+            "message_id": str(msg.id),
+            "conversation_id": str(conv.id),
+            "from_recording": str(rec.id)
+        })
+
+
 def transcribe_recording_job(recording_id: str) -> dict:
     """
     RQ job wrapper for transcription.
@@ -0,0 +1,88 @@
+import logging
+import os
+import socket
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from rq import Queue, SimpleWorker
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
+from rq.timeouts import TimerDeathPenalty
+from .rqueue import get_queue
+from .settings import settings
+from .transcription import get_pipeline
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "transcription"
+
+
+class TranscriptionWorker(SimpleWorker):
+    """
+    Runs one job at a time in the calling thread.
+
+    RQ's usual SIGALRM timeout only works on the main thread; a timer raises
+    JobTimeoutException in the job's thread instead, so job.timeout holds
+    for every slot. Native decoding can't be interrupted, so a timed-out job
+    stops at the next batch of segments.
+    """
+
+    death_penalty_class = TimerDeathPenalty
+
+
+def _dequeue(queue: Queue, block: bool) -> Job | None:
+    timeout = settings.TRANSCRIPTION_DEQUEUE_TIMEOUT_SECONDS if block else None
+    try:
+        result = Queue.dequeue_any([queue], timeout, connection=queue.connection)
+    except DequeueTimeout:
+        return None
+    return result[0] if result else None
+
+
+def run_service() -> None:
+    """
+    Serve the transcription queue from one long-lived process.
+
+    RQ's forking worker reloads the Whisper weights for every job. Here the
+    model is loaded once at startup and shared by up to
+    TRANSCRIPTION_CONCURRENCY jobs running in threads, each going through
+    the batched pipeline. The service blocks on the queue only while idle
+    and tops up free slots without waiting otherwise.
+    """
+    queue = get_queue(QUEUE_NAME)
+
+    logger.info("Loading Whisper model %s", settings.WHISPER_MODEL_SIZE)
+    get_pipeline()
+
+    # One worker per slot: RQ keeps per-worker state (current job, counters)
+    slots = max(1, settings.TRANSCRIPTION_CONCURRENCY)
+    name = f"transcription:{socket.gethostname()}:{os.getpid()}"
+    idle = [
+        TranscriptionWorker([queue], connection=queue.connection, name=f"{name}:{i}")
+        for i in range(slots)
+    ]
+    running: dict[Future, TranscriptionWorker] = {}
+    with ThreadPoolExecutor(max_workers=slots, thread_name_prefix="transcribe") as pool:
+        while True:
+            while idle:
+                job = _dequeue(queue, block=not running)
+                if job is None:
+                    break
+                worker = idle.pop()
+                logger.info("Transcribing job %s", job.id)
+                running[pool.submit(worker.execute_job, job, queue)] = worker
+
+            if running:
+                done, _ = wait(running, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idle.append(running.pop(future))
+                    if future.exception():
+                        logger.error("Transcription bookkeeping failed", exc_info=future.exception())
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    run_service()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, BinaryIO
+from uuid import UUID
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.lock import Lock as AsyncLock
+from redis.exceptions import LockNotOwnedError
+from .settings import settings
+
+
+# Resumable upload state: conversation_id, mime_type, length, offset
+UPLOAD_KEY = "upload:{upload_id}"
+LOCK_KEY = "upload:{upload_id}:lock"
+
+
+class UploadTooLarge(Exception):
+    """The body exceeded the allowed size."""
+
+
+def upload_key(upload_id: UUID) -> str:
+    return UPLOAD_KEY.format(upload_id=upload_id)
+
+
+def partial_path(upload_id: UUID) -> str:
+    return os.path.join(settings.UPLOADS_DIR, f"{upload_id}.part")
+
+
+async def write_stream(
+    chunks: AsyncIterator[bytes],
+    f: BinaryIO,
+    limit: int,
+    hasher: Any = None,
+    on_progress: Any = None
+) -> int:
+    """
+    Copy an async byte stream to a file without holding it in memory.
+
+    Writes happen in a worker thread so the event loop keeps serving other
+    requests. Raises UploadTooLarge as soon as more than `limit` bytes
+    arrive. `on_progress(written)` is awaited after each chunk is written.
+    Returns the number of bytes written.
+    """
+    written = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        written += len(chunk)
+        if written > limit:
+            raise UploadTooLarge()
+        await asyncio.to_thread(f.write, chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+        if on_progress is not None:
+            await on_progress(written)
+    return written
+
+
+async def read_chunks(file: Any) -> AsyncIterator[bytes]:
+    """Iterate an UploadFile in UPLOAD_CHUNK_BYTES pieces."""
+    while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+        yield chunk
+
+
+async def create_upload(redis: AsyncRedis, upload_id: UUID, conversation_id: UUID, mime_type: str, length: int) -> None:
+    key = upload_key(upload_id)
+    await redis.hset(key, mapping={
+        "conversation_id": str(conversation_id),
+        "mime_type": mime_type,
+        "length": length,
+        "offset": 0,
+    })
+    await redis.expire(key, settings.UPLOAD_SESSION_TTL_SECONDS)
+    await asyncio.to_thread(_touch, partial_path(upload_id))
+
+
+async def get_upload(redis: AsyncRedis, upload_id: UUID) -> dict[str, Any] | None:
+    raw = await redis.hgetall(upload_key(upload_id))
+    if not raw:
+        return None
+    state = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    return {
+        "conversation_id": UUID(state["conversation_id"]),
+        "mime_type": state["mime_type"],
+        "length": int(state["length"]),
+        "offset": int(state["offset"]),
+    }
+
+
+async def set_offset(redis: AsyncRedis, upload_id: UUID, offset: int, lock: AsyncLock) -> None:
+    """
+    Record progress made by the holder of `lock`.
+
+    Every chunk received extends the session and the writer's lock. Raises
+    LockNotOwnedError, without recording anything, if the lock expired.
+    """
+    await lock.reacquire()
+    key = upload_key(upload_id)
+    pipe = redis.pipeline()
+    pipe.hset(key, "offset", offset)
+    pipe.expire(key, settings.UPLOAD_SESSION_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def acquire_lock(redis: AsyncRedis, upload_id: UUID) -> AsyncLock | None:
+    """
+    Allow one PATCH at a time per upload.
+
+    Returns the held lock, or None if another request holds it. The lock
+    stores a random token and is only extended or released while it still
+    holds ours, so a writer whose lock expired can't free its successor's.
+    """
+    lock = redis.lock(LOCK_KEY.format(upload_id=upload_id), timeout=settings.UPLOAD_LOCK_SECONDS)
+    return lock if await lock.acquire(blocking=False) else None
+
+
+async def release_lock(lock: AsyncLock) -> None:
+    try:
+        await lock.release()
+    except LockNotOwnedError:
+        # Expired and possibly taken by another request; it's theirs now
+        pass
+
+
+async def discard_upload(redis: AsyncRedis, upload_id: UUID) -> None:
+    await redis.delete(upload_key(upload_id))
+    try:
+        await asyncio.to_thread(os.remove, partial_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def _touch(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
@@ -1,30 +1,242 @@
 import asyncio
+import json
+import logging
+from typing import Any, Callable
+from uuid import UUID
 from fastapi import WebSocket
-from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import PubSub
+from sqlalchemy import select
+from .db import AsyncSessionLocal
+from .models import RealtimeEvent
+from .rqueue import get_async_redis
+from .settings import settings
 
 
-async def bridge_redis_to_ws(redis: Redis, project_id: str, ws: WebSocket) -> None:
-    pubsub = redis.pubsub()
-    channel = f"project:{project_id}"
-    pubsub.subscribe(channel)
+logger = logging.getLogger(__name__)
 
-    loop = asyncio.get_running_loop()
 
-    try:
-        while True:
-            msg = await loop.run_in_executor(None, pubsub.get_message, True, 1.0)
-            if not msg:
-                await asyncio.sleep(0.05)
+class RealtimeHub:
+    """
+    Fan out Redis pub/sub messages to the WebSockets of this process.
+
+    A single pub/sub connection is shared by every socket. Channels are
+    subscribed when the first local listener asks for them and released when
+    the last one leaves, so a socket only costs a bounded queue.
+    """
+
+    def __init__(self, redis_factory: Callable[[], AsyncRedis] = get_async_redis):
+        self._redis_factory = redis_factory
+        self._pubsub: PubSub | None = None
+        self._reader: asyncio.Task | None = None
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._lock = asyncio.Lock()
+        self._closing = False
+
+    async def subscribe(self, channel: str) -> asyncio.Queue:
+        """Register a local subscriber for a channel and return its message queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_QUEUE_MAXSIZE)
+
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self._redis_factory().pubsub(ignore_subscribe_messages=True)
+
+            subscribers = self._subscribers.setdefault(channel, set())
+            if not subscribers:
+                await self._pubsub.subscribe(channel)
+            subscribers.add(queue)
+
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read_loop())
+
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: asyncio.Queue) -> None:
+        """Drop a subscriber, releasing the Redis channel when it was the last one."""
+        async with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                return
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+                if self._pubsub is not None:
+                    await self._pubsub.unsubscribe(channel)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._reader is not None:
+            self._reader.cancel()
+            # The reader also exits on its own within one read timeout
+            await asyncio.wait({self._reader}, timeout=2.0)
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self._subscribers.clear()
+
+    async def _read_loop(self) -> None:
+        while not self._closing:
+            try:
+                msg = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # redis-py reconnects and resubscribes on the next read
+                logger.exception("Realtime hub failed to read from Redis")
+                await asyncio.sleep(1.0)
                 continue
-            if msg.get("type") != "message":
+
+            if not msg or msg.get("type") != "message":
                 continue
+
+            channel = msg["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
             data = msg["data"]
             if isinstance(data, bytes):
                 data = data.decode("utf-8")
-            await ws.send_text(data)
-    finally:
+
+            for queue in list(self._subscribers.get(channel, ())):
+                self._deliver(channel, queue, data)
+
+    def _deliver(self, channel: str, queue: asyncio.Queue, data: str) -> None:
+        try:
+            queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Slow consumer: stop feeding it and signal that messages were lost
+            self._subscribers.get(channel, set()).discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+hub = RealtimeHub()
+
+
+async def load_events_since(project_id: str, since: int) -> tuple[list[dict[str, Any]], bool]:
+    """
+    Collect a project's events with seq > since, oldest first.
+
+    Persisted events come from realtime_events; events still waiting in the
+    journal stream are read from Redis. Returns (events, truncated) where
+    truncated means more than WS_REPLAY_MAX_EVENTS were missed.
+    """
+    project_id = str(UUID(project_id))
+    limit = settings.WS_REPLAY_MAX_EVENTS
+    events: dict[int, dict[str, Any]] = {}
+
+    # Read the journal before the table: an entry flushed in between then
+    # shows up in the table instead of falling through the gap
+    if settings.EVENT_JOURNAL_ENABLED:
+        redis = get_async_redis()
+        start = f"{since + 1}-0"
+        while len(events) <= limit:
+            # Only unflushed events remain in the stream; entry IDs are "<seq>-0"
+            entries = await redis.xrange(settings.EVENT_JOURNAL_STREAM, min=start, count=500)
+            if not entries:
+                break
+            for _, fields in entries:
+                f = {k.decode("utf-8"): v.decode("utf-8") for k, v in fields.items()}
+                if f["project_id"] == project_id:
+                    events[int(f["seq"])] = {
+                        "type": f["event_type"],
+                        "ts": f["ts"],
+                        "project_id": f["project_id"],
+                        "payload": json.loads(f["payload"]),
+                        "seq": int(f["seq"]),
+                    }
+            last_seq = int(entries[-1][0].decode("utf-8").split("-")[0])
+            start = f"{last_seq + 1}-0"
+
+    async with AsyncSessionLocal() as db:
+        rows = (await db.scalars(
+            select(RealtimeEvent)
+            .where(RealtimeEvent.project_id == project_id)
+            .where(RealtimeEvent.seq > since)
+            .order_by(RealtimeEvent.seq.asc())
+            .limit(limit + 1)
+        )).all()
+    for row in rows:
+        events.setdefault(row.seq, {
+            "type": row.event_type,
+            "ts": row.created_at.isoformat(),
+            "project_id": str(row.project_id),
+            "payload": row.payload,
+            "seq": row.seq,
+        })
+
+    ordered = [events[k] for k in sorted(events)]
+    return ordered[:limit], len(ordered) > limit
+
+
+async def bridge_redis_to_ws(
+    hub: RealtimeHub,
+    project_id: str,
+    ws: WebSocket,
+    since: int | None = None
+) -> None:
+    channel = f"project:{project_id}"
+    # Subscribe before replaying so nothing published meanwhile is missed
+    queue = await hub.subscribe(channel)
+
+    try:
+        replayed_through = since
+        if since is not None:
+            replayed_through = await _replay(project_id, since, ws)
+
+        sender = asyncio.create_task(_forward_messages(queue, ws, replayed_through))
+        receiver = asyncio.create_task(_wait_for_disconnect(ws))
+
         try:
-            pubsub.unsubscribe(channel)
-            pubsub.close()
-        except Exception:
-            pass
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            sender.cancel()
+            receiver.cancel()
+    finally:
+        await hub.unsubscribe(channel, queue)
+
+
+async def _replay(project_id: str, since: int, ws: WebSocket) -> int | None:
+    """Send the events after `since`; returns the highest seq sent, if any."""
+    events, truncated = await load_events_since(project_id, since)
+    if truncated:
+        # Too far behind for a delta; the client should reload its lists
+        await ws.send_text(json.dumps({"type": "replay.truncated", "project_id": project_id, "since": since}))
+        return None
+
+    for event in events:
+        await ws.send_text(json.dumps(event))
+    await ws.send_text(json.dumps({
+        "type": "replay.completed",
+        "project_id": project_id,
+        "seq": events[-1]["seq"] if events else since,
+    }))
+    return events[-1]["seq"] if events else since
+
+
+async def _forward_messages(queue: asyncio.Queue, ws: WebSocket, replayed_through: int | None) -> None:
+    # A socket follows one project, whose events are committed and published
+    # in seq order (see app.events). Live copies of events at or below the
+    # replay's last seq were already sent or already held by the client;
+    # everything after that arrives exactly once, so it is never filtered.
+    while True:
+        data = await queue.get()
+        if data is None:
+            # Dropped as a slow consumer; the client should reconnect
+            await ws.close(code=1013)
+            return
+        if replayed_through is not None:
+            seq = json.loads(data).get("seq")
+            if seq is not None and seq <= replayed_through:
+                continue
+        await ws.send_text(data)
+
+
+async def _wait_for_disconnect(ws: WebSocket) -> None:
+    while True:
+        msg = await ws.receive()
+        if msg["type"] == "websocket.disconnect":
+            return
@@ -16,10 +16,10 @@ class ApiError extends Error {
   }
 }
 
-async function fetchApi<T>(
+async function request(
   endpoint: string,
   options: FetchOptions = {}
-): Promise<T> {
+): Promise<Response> {
   const { token, ...fetchOptions } = options
 
   const headers: Record<string, string> = {
@@ -50,6 +50,15 @@ async function fetchApi<T>(
     )
   }
 
+  return response
+}
+
+async function fetchApi<T>(
+  endpoint: string,
+  options: FetchOptions = {}
+): Promise<T> {
+  const response = await request(endpoint, options)
+
   if (response.status === 204) {
     return undefined as T
   }
@@ -57,6 +66,38 @@ async function fetchApi<T>(
   return response.json()
 }
 
+export interface Page<T> {
+  items: T[]
+  nextCursor: string | null
+}
+
+// List endpoints return one page and the cursor for the next in X-Next-Cursor
+async function fetchPage<T>(
+  endpoint: string,
+  cursor?: string | null,
+  options: FetchOptions = {}
+): Promise<Page<T>> {
+  const url = cursor
+    ? `${endpoint}${endpoint.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}`
+    : endpoint
+  const response = await request(url, options)
+  return {
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  }
+}
+
+async function fetchAll<T>(endpoint: string, options: FetchOptions = {}): Promise<T[]> {
+  const items: T[] = []
+  let cursor: string | null = null
+  do {
+    const page: Page<T> = await fetchPage<T>(endpoint, cursor, options)
+    items.push(...page.items)
+    cursor = page.nextCursor
+  } while (cursor)
+  return items
+}
+
 // Auth API
 export interface LoginRequest {
   email: string
@@ -116,7 +157,9 @@ export interface UpdateProjectRequest {
 
 export const projectsApi = {
   list: (token: string) =>
-    fetchApi<Project[]>('/projects', { token }),
+    fetchAll<Project>('/projects', { token }).then((projects) =>
+      projects.sort((a, b) => Date.parse(b.updated_at) - Date.parse(a.updated_at))
+    ),
 
   get: (id: string, token: string) =>
     fetchApi<Project>(`/projects/${id}`, { token }),
@@ -162,6 +205,7 @@ export interface Task {
   type: TaskType
   priority: number
   status: TaskStatus
+  pending_deps: number
   requested_by: string
   created_at: string
   updated_at: string
@@ -172,11 +216,15 @@ export interface CreateTaskRequest {
   description: string
   type: TaskType
   priority?: number
+  depends_on?: string[]
 }
 
 export const tasksApi = {
   list: (projectId: string, token: string) =>
-    fetchApi<Task[]>(`/projects/${projectId}/tasks`, { token }),
+    fetchAll<Task>(`/projects/${projectId}/tasks`, { token }).then((tasks) =>
+      // Pages come in creation order; stable sort keeps it within a priority
+      tasks.sort((a, b) => a.priority - b.priority)
+    ),
 
   get: (projectId: string, taskId: string, token: string) =>
     fetchApi<Task>(`/projects/${projectId}/tasks/${taskId}`, { token }),
@@ -235,6 +283,9 @@ export const runsApi = {
   list: (projectId: string, token: string) =>
     fetchApi<AgentRun[]>(`/projects/${projectId}/runs`, { token }),
 
+  page: (projectId: string, token: string, cursor?: string | null) =>
+    fetchPage<AgentRun>(`/projects/${projectId}/runs`, cursor, { token }),
+
   get: (projectId: string, runId: string, token: string) =>
     fetchApi<AgentRun>(`/projects/${projectId}/runs/${runId}`, { token }),
 
@@ -248,6 +299,9 @@ export interface Recording {
   conversation_id: string
   storage_path: string
   mime_type: string
+  content_hash: string | null
+  normalized_path: string | null
+  playback_path: string | null
   duration_ms: number | null
   transcript_text: string | null
   created_at: string
@@ -363,6 +417,9 @@ export const conversationsApi = {
   list: (projectId: string, token: string) =>
     fetchApi<Conversation[]>(`/projects/${projectId}/conversations`, { token }),
 
+  page: (projectId: string, token: string, cursor?: string | null) =>
+    fetchPage<Conversation>(`/projects/${projectId}/conversations`, cursor, { token }),
+
   get: (projectId: string, conversationId: string, token: string) =>
     fetchApi<Conversation>(
       `/projects/${projectId}/conversations/${conversationId}`,
@@ -36,11 +36,17 @@ export type WebSocketEventType =
   | 'task.event.appended'
   | 'agent.run.started'
   | 'agent.run.log.appended'
+  | 'agent.run.logs.appended'
   | 'agent.run.completed'
+  | 'agent.run.requeued'
   | 'conversation.message.created'
   | 'recording.created'
+  | 'recording.transcript.partial'
+  | 'recording.processed'
   | 'orchestrator.cycle.started'
   | 'orchestrator.cycle.completed'
+  | 'replay.completed'
+  | 'replay.truncated'
 
 export interface WebSocketEvent<T = unknown> {
   type: WebSocketEventType
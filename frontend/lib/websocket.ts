@@ -22,6 +22,8 @@ export class WebSocketManager {
   private messageHandlers: Map<string, Set<MessageHandler>> = new Map()
   private statusHandlers: Set<StatusHandler> = new Set()
   private status: ConnectionStatus = 'disconnected'
+  // Highest event seq seen; sent as `since` on reconnect to replay missed events
+  private lastSeq: number | null = null
 
   constructor(config: WebSocketConfig) {
     this.config = {
@@ -45,9 +47,15 @@ export class WebSocketManager {
 
     this.setStatus('connecting')
 
-    const url = this.config.token
-      ? `${this.config.url}?token=${this.config.token}`
-      : this.config.url
+    const params = new URLSearchParams()
+    if (this.config.token) {
+      params.set('token', this.config.token)
+    }
+    if (this.lastSeq !== null) {
+      params.set('since', String(this.lastSeq))
+    }
+    const query = params.toString()
+    const url = query ? `${this.config.url}?${query}` : this.config.url
 
     try {
       this.ws = new WebSocket(url)
@@ -137,6 +145,10 @@ export class WebSocketManager {
   private handleMessage(data: { type?: string; [key: string]: any }): void {
     const { type = '*', ...rest } = data
 
+    if (typeof data.seq === 'number' && (this.lastSeq === null || data.seq > this.lastSeq)) {
+      this.lastSeq = data.seq
+    }
+
     // Call type-specific handlers
     this.messageHandlers.get(type)?.forEach((handler) => handler(rest))
 
@@ -22,6 +22,48 @@ class ApiClient:
         r.raise_for_status()
         return r.json()
 
+    def claim_run(
+        self,
+        runner_id: str,
+        wait_seconds: float,
+        project_ids: list[str] | None = None,
+        repo_roots: list[str] | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Long-poll to claim the next run across the projects this runner serves.
+
+        Pass project_ids to serve specific projects, or repo_roots to serve
+        every project whose default repo lives under one of them. Returns the
+        run envelope ({run, task, project, agent}) or None if nothing could
+        be claimed within wait_seconds.
+        """
+        r = httpx.post(
+            f"{self.base_url}/api/runs/claim",
+            json={
+                "runner_id": runner_id,
+                "wait": wait_seconds,
+                "project_ids": project_ids,
+                "repo_roots": repo_roots,
+            },
+            headers=self._headers(),
+            timeout=wait_seconds + 30.0,
+        )
+        r.raise_for_status()
+        if r.status_code == 204:
+            return None
+        return r.json()
+
+    def heartbeat_run(self, run_id: str, runner_id: str) -> dict[str, Any]:
+        """Renew the lease on a claimed run."""
+        r = httpx.post(
+            f"{self.base_url}/api/runs/{run_id}/heartbeat",
+            json={"runner_id": runner_id},
+            headers=self._headers(),
+            timeout=30.0,
+        )
+        r.raise_for_status()
+        return r.json()
+
     def get_run(self, run_id: str) -> dict[str, Any]:
         """Get details of a specific run."""
         r = httpx.get(
@@ -72,11 +114,28 @@ class ApiClient:
         )
         r.raise_for_status()
 
-    def complete_run(self, run_id: str, status: str, exit_code: int, summary: str) -> None:
+    def append_run_logs(self, run_id: str, entries: list[dict[str, Any]]) -> None:
+        """Append a batch of log entries ({seq, stream, message}) to a run."""
+        r = httpx.post(
+            f"{self.base_url}/api/runs/{run_id}/logs/batch",
+            json=entries,
+            headers=self._headers(),
+            timeout=30.0,
+        )
+        r.raise_for_status()
+
+    def complete_run(
+        self,
+        run_id: str,
+        status: str,
+        exit_code: int,
+        summary: str,
+        runner_id: str | None = None
+    ) -> None:
         """Mark a run as complete."""
         r = httpx.post(
             f"{self.base_url}/api/runs/{run_id}/complete",
-            json={"status": status, "exit_code": exit_code, "summary": summary},
+            json={"status": status, "exit_code": exit_code, "summary": summary, "runner_id": runner_id},
             headers=self._headers(),
             timeout=30.0,
         )
@@ -4,5 +4,14 @@ from pydantic import BaseModel
 class RunnerConfig(BaseModel):
     api_base_url: str
     token: str
+    runner_id: str
     poll_interval_seconds: float = 2.0
+    dispatch_wait_seconds: float = 25.0
     allowed_roots: list[str]
+    project_ids: list[str] = []
+    log_batch_max_lines: int = 200
+    log_flush_interval_seconds: float = 0.5
+    log_max_pending_lines: int = 10_000
+    heartbeat_interval_seconds: float = 20.0
+    max_concurrent_runs: int = 4
+    max_waiting_runs: int = 4
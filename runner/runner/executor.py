@@ -1,7 +1,7 @@
 import subprocess
 import select
 import sys
-from typing import Generator
+from typing import Callable, Generator
 from .sandbox import sanitize_env
 
 
@@ -44,7 +44,8 @@ def run_shell(repo_root: str, command: str, env: dict[str, str] | None = None) -
 def run_shell_streaming(
     repo_root: str,
     command: str,
-    env: dict[str, str] | None = None
+    env: dict[str, str] | None = None,
+    should_stop: Callable[[], bool] | None = None
 ) -> Generator[tuple[str, str], None, int]:
     """
     Execute a shell command and yield output lines as they arrive.
@@ -53,6 +54,8 @@ def run_shell_streaming(
         repo_root: Directory to run command in
         command: Shell command to execute
         env: Environment variables (will be sanitized)
+        should_stop: Polled while the command runs; the process is
+            terminated once it returns True
 
     Yields:
         Tuples of (stream, line) where stream is 'stdout' or 'stderr'
@@ -76,6 +79,8 @@ def run_shell_streaming(
     if sys.platform != "win32":
         # Unix: use select for non-blocking reads
         while p.poll() is None:
+            if should_stop and should_stop():
+                p.terminate()
             readable, _, _ = select.select([p.stdout, p.stderr], [], [], 0.1)
             for stream in readable:
                 line = stream.readline()
@@ -85,6 +90,8 @@ def run_shell_streaming(
     else:
         # Windows: alternate reading (less efficient but works)
         while p.poll() is None:
+            if should_stop and should_stop():
+                p.terminate()
             if p.stdout:
                 line = p.stdout.readline()
                 if line:
@@ -0,0 +1,47 @@
+import threading
+import httpx
+from .api_client import ApiClient
+
+
+class RunLease:
+    """
+    Keep a claimed run's lease alive while the runner works on it.
+
+    A background thread heartbeats every interval_seconds. If the API says
+    the run is no longer leased to this runner (it was requeued after a
+    missed heartbeat, or completed elsewhere), `lost` is set and the caller
+    should stop executing the run.
+    """
+
+    def __init__(self, api: ApiClient, run_id: str, runner_id: str, interval_seconds: float = 20.0):
+        self.api = api
+        self.run_id = run_id
+        self.runner_id = runner_id
+        self.interval_seconds = interval_seconds
+
+        self._lost = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._thread.start()
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def close(self) -> None:
+        """Stop heartbeating."""
+        self._closed.set()
+        self._thread.join()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._closed.wait(self.interval_seconds):
+            try:
+                self.api.heartbeat_run(self.run_id, self.runner_id)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in (404, 409):
+                    print(f"Lost lease on run {self.run_id}")
+                    self._lost.set()
+                    return
+                print(f"Error renewing lease for run {self.run_id}: {e}")
+            except Exception as e:
+                print(f"Error renewing lease for run {self.run_id}: {e}")
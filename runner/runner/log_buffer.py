@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Any
+from .api_client import ApiClient
+
+# Upper bound on the wait between retries while the API keeps failing
+_MAX_BACKOFF_SECONDS = 30.0
+
+
+class RunLogBuffer:
+    """
+    Buffer run log lines and ship them to the API in batches.
+
+    A background thread flushes whatever is pending every
+    flush_interval_seconds, or as soon as max_lines are buffered, so quiet
+    commands still stream promptly and appending never waits on the network.
+    Failed flushes keep their entries and are retried with exponential
+    backoff; the API skips seqs it has already stored. While the API is
+    down at most max_pending_lines are kept, dropping the oldest.
+
+    Log shipping is best effort: nothing here raises into the run, and
+    close() gives up after retry_attempts and drops what is left.
+    """
+
+    def __init__(
+        self,
+        api: ApiClient,
+        run_id: str,
+        max_lines: int = 200,
+        flush_interval_seconds: float = 0.5,
+        max_pending_lines: int = 10_000,
+        retry_attempts: int = 5,
+        retry_backoff_seconds: float = 0.5,
+    ):
+        self.api = api
+        self.run_id = run_id
+        self.max_lines = max_lines
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending_lines = max_pending_lines
+        self.retry_attempts = retry_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._seq = 0
+        self._pending: list[dict[str, Any]] = []
+        self._dropped = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, stream: str, message: str) -> int:
+        """Buffer a log line and return the next sequence number."""
+        with self._lock:
+            self._pending.append({"seq": self._seq, "stream": stream, "message": message})
+            self._seq += 1
+            seq = self._seq
+            self._trim()
+            full = len(self._pending) >= self.max_lines
+
+        if full:
+            self._wake.set()
+        return seq
+
+    def flush(self) -> bool:
+        """
+        Send all pending lines, at most max_lines per request.
+
+        Returns False if a request failed; the unsent lines stay buffered
+        and the background thread holds off until the backoff has passed.
+        """
+        # Serialize flushes so batches reach the API in seq order
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            for i in range(0, len(pending), self.max_lines):
+                try:
+                    self.api.append_run_logs(self.run_id, pending[i:i + self.max_lines])
+                except Exception as e:
+                    with self._lock:
+                        self._pending = pending[i:] + self._pending
+                        self._trim()
+                    self._failures += 1
+                    self._retry_at = time.monotonic() + self._backoff()
+                    print(f"Error flushing logs for run {self.run_id}: {e}")
+                    return False
+            self._failures = 0
+            return True
+
+    def close(self) -> None:
+        """Stop the background flusher and send any remaining lines."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+
+        for attempt in range(self.retry_attempts):
+            if self.flush():
+                break
+            if attempt + 1 < self.retry_attempts:
+                time.sleep(self._backoff())
+        else:
+            with self._lock:
+                self._dropped += len(self._pending)
+                self._pending = []
+
+        if self._dropped:
+            print(f"WARNING: dropped {self._dropped} log lines for run {self.run_id}")
+
+    def _backoff(self) -> float:
+        return min(self.retry_backoff_seconds * 2 ** max(self._failures - 1, 0), _MAX_BACKOFF_SECONDS)
+
+    def _trim(self) -> None:
+        # Caller holds self._lock
+        excess = len(self._pending) - self.max_pending_lines
+        if excess <= 0:
+            return
+        if not self._dropped:
+            print(f"WARNING: log buffer for run {self.run_id} is full; dropping oldest lines")
+        del self._pending[:excess]
+        self._dropped += excess
+
+    def _flush_loop(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            if self._closed.is_set():
+                return
+            if time.monotonic() >= self._retry_at:
+                self.flush()
@@ -1,9 +1,15 @@
 import os
 import re
+import socket
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from .config import RunnerConfig
 from .api_client import ApiClient
 from .executor import run_shell_streaming
+from .lease import RunLease
+from .log_buffer import RunLogBuffer
+from .repo_locks import RepoLocks
 from .sandbox import assert_allowed_path, is_safe_command
 
 
@@ -11,70 +17,126 @@ def main() -> None:
     """
     Main entry point for the runner.
 
-    The runner polls for started runs and executes tasks in local repositories.
+    The runner long-polls the API to claim runs and executes tasks in local
+    repositories as soon as they arrive. One runner serves a set of projects:
+    those listed in RUNNER_PROJECT_IDS, or otherwise every project whose
+    default repo path lies inside RUNNER_ALLOWED_ROOTS. Claimed runs are leased to this
+    runner and kept alive with heartbeats, so several runners can serve the
+    same project without executing a run twice.
+
+    Up to RUNNER_MAX_CONCURRENT_RUNS runs execute at once on a thread pool;
+    runs that target the same repository wait for each other. A waiting run
+    gives its slot back, so a queue of runs for one busy repo doesn't stall
+    runs for other repos; up to RUNNER_MAX_WAITING_RUNS runs may wait at once.
 
     Environment variables:
         RUNNER_API_BASE_URL: Backend API URL (default: http://localhost:8000)
         RUNNER_TOKEN: Authentication token (required)
         RUNNER_ALLOWED_ROOTS: Comma-separated list of allowed repo directories (required)
-        RUNNER_PROJECT_ID: Project ID to poll for runs (required)
+        RUNNER_PROJECT_IDS: Comma-separated project IDs to serve (default: all
+            projects under RUNNER_ALLOWED_ROOTS)
+        RUNNER_PROJECT_ID: Single project ID, kept for older deployments
+        RUNNER_ID: Unique name for this runner (default: <hostname>-<pid>)
+        RUNNER_MAX_CONCURRENT_RUNS: Runs executed in parallel (default: 4)
+        RUNNER_MAX_WAITING_RUNS: Claimed runs that may wait for a busy repo
+            (default: RUNNER_MAX_CONCURRENT_RUNS)
     """
     api_base_url = os.environ.get("RUNNER_API_BASE_URL", "http://localhost:8000")
     token = os.environ.get("RUNNER_TOKEN", "")
     allowed_roots = os.environ.get("RUNNER_ALLOWED_ROOTS", "").split(",")
     allowed_roots = [x.strip() for x in allowed_roots if x.strip()]
-    project_id = os.environ.get("RUNNER_PROJECT_ID", "")
+    project_ids = os.environ.get("RUNNER_PROJECT_IDS", os.environ.get("RUNNER_PROJECT_ID", "")).split(",")
+    project_ids = [x.strip() for x in project_ids if x.strip()]
+    runner_id = os.environ.get("RUNNER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+    max_concurrent_runs = int(os.environ.get("RUNNER_MAX_CONCURRENT_RUNS", "4"))
 
     if not token:
         raise RuntimeError("RUNNER_TOKEN is required")
     if not allowed_roots:
         raise RuntimeError("RUNNER_ALLOWED_ROOTS is required")
-    if not project_id:
-        raise RuntimeError("RUNNER_PROJECT_ID is required")
 
     cfg = RunnerConfig(
         api_base_url=api_base_url,
         token=token,
-        allowed_roots=allowed_roots
+        runner_id=runner_id,
+        allowed_roots=allowed_roots,
+        project_ids=project_ids,
+        max_concurrent_runs=max_concurrent_runs,
+        max_waiting_runs=int(os.environ.get("RUNNER_MAX_WAITING_RUNS", max_concurrent_runs))
     )
     api = ApiClient(cfg.api_base_url, cfg.token)
 
-    print(f"Runner started for project {project_id}")
+    if project_ids:
+        print(f"Runner {runner_id} started for projects {project_ids}")
+    else:
+        print(f"Runner {runner_id} started for all projects under allowed roots")
     print(f"Allowed roots: {allowed_roots}")
-    print(f"Poll interval: {cfg.poll_interval_seconds}s")
+    print(f"Running up to {cfg.max_concurrent_runs} runs concurrently")
+    print(f"Waiting for runs (long-poll {cfg.dispatch_wait_seconds}s)")
+
+    max_workers = cfg.max_concurrent_runs + cfg.max_waiting_runs
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="run")
+    # Only claim a run when a thread is free to start it right away and it
+    # can run now; runs blocked on a busy repo hand their slot back
+    threads = threading.BoundedSemaphore(max_workers)
+    slots = threading.BoundedSemaphore(cfg.max_concurrent_runs)
+    repo_locks = RepoLocks()
+
+    def release(_) -> None:
+        slots.release()
+        threads.release()
 
     while True:
+        threads.acquire()
+        slots.acquire()
         try:
-            runs = api.list_active_runs(project_id)
-
-            for run in runs:
-                if run.get("status") != "started":
-                    continue
+            envelope = api.claim_run(
+                cfg.runner_id,
+                cfg.dispatch_wait_seconds,
+                project_ids=cfg.project_ids or None,
+                repo_roots=None if cfg.project_ids else cfg.allowed_roots,
+            )
+        except Exception as e:
+            release(None)
+            print(f"Error claiming run: {e}")
+            time.sleep(cfg.poll_interval_seconds)
+            continue
 
-                run_id = run["id"]
-                task_id = run.get("task_id")
-                agent_id = run.get("agent_id")
+        if not envelope:
+            release(None)
+            continue
 
-                if not task_id:
-                    print(f"Run {run_id} has no task, skipping")
-                    continue
+        future = pool.submit(run_envelope, api, cfg, envelope, repo_locks, slots)
+        future.add_done_callback(release)
 
-                try:
-                    task = api.get_task(task_id)
-                    project = api.get_project(project_id)
-                    agent = api.get_agent(agent_id) if agent_id else None
-                    execute_task(api, cfg, project_id, run_id, task, project, agent)
-                except Exception as e:
-                    print(f"Error executing run {run_id}: {e}")
-                    try:
-                        api.complete_run(run_id, "failed", 1, f"Runner error: {str(e)}")
-                    except Exception:
-                        pass
 
-        except Exception as e:
-            print(f"Error polling runs: {e}")
+def run_envelope(
+    api: ApiClient,
+    cfg: RunnerConfig,
+    envelope: dict,
+    repo_locks: RepoLocks,
+    slots: threading.Semaphore
+) -> None:
+    """Execute a claimed run, failing it if the runner itself errors."""
+    run = envelope["run"]
+    run_id = run["id"]
+    project_id = run["project_id"]
+    task = envelope.get("task")
 
-        time.sleep(cfg.poll_interval_seconds)
+    try:
+        if not task:
+            print(f"Run {run_id} has no task, failing it")
+            api.complete_run(run_id, "failed", 1, "Run has no task", cfg.runner_id)
+            return
+        execute_task(
+            api, cfg, project_id, run_id, task, envelope["project"], envelope.get("agent"), repo_locks, slots
+        )
+    except Exception as e:
+        print(f"Error executing run {run_id}: {e}")
+        try:
+            api.complete_run(run_id, "failed", 1, f"Runner error: {str(e)}", cfg.runner_id)
+        except Exception:
+            pass
 
 
 def execute_task(
@@ -84,23 +146,59 @@ def execute_task(
     run_id: str,
     task: dict,
     project: dict,
-    agent: dict | None
+    agent: dict | None,
+    repo_locks: RepoLocks,
+    slots: threading.Semaphore
 ) -> None:
     """
     Execute a task by running shell commands in the project repo.
 
+    The command runs while holding the repo's lock, so concurrent runs never
+    mutate the same checkout. The caller's slot is released while waiting
+    for the lock and taken again before the command starts.
+
     Command resolution order:
     1. Explicit command in task description (```bash ... ``` or ```sh ... ```)
     2. Command from agent config_json["default_command"]
     3. Default command based on task type
     """
-    seq = 0
+    lease = RunLease(api, run_id, cfg.runner_id, interval_seconds=cfg.heartbeat_interval_seconds)
+    logs = RunLogBuffer(
+        api,
+        run_id,
+        max_lines=cfg.log_batch_max_lines,
+        flush_interval_seconds=cfg.log_flush_interval_seconds,
+        max_pending_lines=cfg.log_max_pending_lines,
+    )
+    try:
+        _execute_task(api, cfg, run_id, task, project, agent, logs, lease, repo_locks, slots)
+    finally:
+        logs.close()
+        lease.close()
+
+
+def _execute_task(
+    api: ApiClient,
+    cfg: RunnerConfig,
+    run_id: str,
+    task: dict,
+    project: dict,
+    agent: dict | None,
+    logs: RunLogBuffer,
+    lease: RunLease,
+    repo_locks: RepoLocks,
+    slots: threading.Semaphore
+) -> None:
+    log = logs.append
 
-    def log(stream: str, message: str) -> int:
-        nonlocal seq
-        api.append_run_log(run_id, seq, stream, message)
-        seq += 1
-        return seq
+    def complete(status: str, exit_code: int, summary: str) -> None:
+        # Ship the logs before the run is marked complete; close() never
+        # raises, so a failing log endpoint can't keep the run open
+        logs.close()
+        if lease.lost:
+            print(f"Run {run_id} was requeued; not reporting completion")
+            return
+        api.complete_run(run_id, status, exit_code, summary, cfg.runner_id)
 
     log("system", f"=== Task: {task['title']} ===")
     log("system", f"Type: {task['type']} | Priority: {task['priority']}")
@@ -112,7 +210,7 @@ def execute_task(
 
     if not repo_root:
         log("stderr", "ERROR: No repo path configured for project or agent")
-        api.complete_run(run_id, "failed", 1, "No repo path configured")
+        complete("failed", 1, "No repo path configured")
         return
 
     # Validate repo path is allowed
@@ -120,12 +218,12 @@ def execute_task(
         assert_allowed_path(repo_root, cfg.allowed_roots)
     except RuntimeError as e:
         log("stderr", f"ERROR: {e}")
-        api.complete_run(run_id, "failed", 1, str(e))
+        complete("failed", 1, str(e))
         return
 
     if not os.path.isdir(repo_root):
         log("stderr", f"ERROR: Repo path does not exist: {repo_root}")
-        api.complete_run(run_id, "failed", 1, f"Repo path does not exist: {repo_root}")
+        complete("failed", 1, f"Repo path does not exist: {repo_root}")
         return
 
     log("system", f"Repo: {repo_root}")
@@ -135,39 +233,50 @@ def execute_task(
 
     if not command:
         log("stderr", "ERROR: No command found in task description or agent config")
-        api.complete_run(run_id, "failed", 1, "No command to execute")
+        complete("failed", 1, "No command to execute")
         return
 
     # Safety check
     if not is_safe_command(command):
         log("stderr", f"ERROR: Command blocked by safety check: {command}")
-        api.complete_run(run_id, "failed", 1, "Command blocked by safety check")
+        complete("failed", 1, "Command blocked by safety check")
         return
 
     log("system", f"Command: {command}")
-    log("system", "--- Output ---")
 
-    # Execute command and stream output
+    # Execute command and stream output, one run per repo at a time
     exit_code = 0
-    try:
-        gen = run_shell_streaming(repo_root, command)
-        while True:
-            try:
-                stream, line = next(gen)
-                log(stream, line)
-            except StopIteration as e:
-                exit_code = e.value if e.value is not None else 0
-                break
-    except Exception as e:
-        log("stderr", f"Execution error: {e}")
-        exit_code = 1
+    waited = False
+
+    def on_wait() -> None:
+        nonlocal waited
+        waited = True
+        log("system", "Waiting for another run in this repo...")
+        slots.release()
+
+    with repo_locks.hold(repo_root, on_wait=on_wait):
+        if waited:
+            slots.acquire()
+        log("system", "--- Output ---")
+        try:
+            gen = run_shell_streaming(repo_root, command, should_stop=lambda: lease.lost)
+            while True:
+                try:
+                    stream, line = next(gen)
+                    log(stream, line)
+                except StopIteration as e:
+                    exit_code = e.value if e.value is not None else 0
+                    break
+        except Exception as e:
+            log("stderr", f"Execution error: {e}")
+            exit_code = 1
 
     log("system", f"--- Exit code: {exit_code} ---")
 
     # Complete the run
     status = "completed" if exit_code == 0 else "failed"
     summary = f"Task '{task['title']}' {status} with exit code {exit_code}"
-    api.complete_run(run_id, status, exit_code, summary)
+    complete(status, exit_code, summary)
     print(f"Run {run_id} {status} (exit {exit_code})")
 
 
@@ -0,0 +1,39 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class RepoLocks:
+    """
+    One lock per repository root.
+
+    Runs that target the same repo_root take turns; runs in different repos
+    proceed in parallel. Paths are normalized so symlinks and trailing
+    slashes resolve to the same lock.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, repo_root: str) -> threading.Lock:
+        key = os.path.realpath(repo_root)
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def hold(self, repo_root: str, on_wait: Callable[[], None] | None = None) -> Iterator[None]:
+        """Hold the repo's lock for the duration of the block."""
+        lock = self._lock_for(repo_root)
+        if not lock.acquire(blocking=False):
+            if on_wait:
+                on_wait()
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()